@@ -1,4 +1,4 @@
-from flask import Flask, jsonify, request
+from flask import Flask, abort, g, jsonify, request
 from flask_httpauth import HTTPBasicAuth
 from flask_jwt_extended import JWTManager, create_access_token
 import mysql.connector
@@ -8,12 +8,32 @@ from werkzeug.security import check_password_hash, generate_password_hash, check
 from functools import wraps
 import datetime
 import logging
+import os
+import re
+import threading
+import time
+import collections
+import base64
+import codecs
+import csv
+import io
+import uuid
+import hashlib
+import zlib
+import click
+import bisect
+import cProfile
+import itertools
+import pstats
+import sys
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from decimal import Decimal
 
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = "keinth123"
 app.config['TESTING'] = False
+app.config['DISABLE_BLACKLIST_CHECK'] = False
 
 # Initialize JWTManager
 jwt_manager = JWTManager(app)
@@ -21,6 +41,198 @@ jwt_manager = JWTManager(app)
 auth = HTTPBasicAuth()
 USER_DATA_FILE = "users.json"
 
+# Metrics
+# Prometheus metrics kept per worker process; each worker serves its own values at /metrics.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+def format_labels(names, values):
+    """Render {name="value",...} with values escaped per the text exposition format"""
+    if not names:
+        return ""
+    escape = lambda value: str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values)) + "}"
+
+class Metric:
+    """A counter or gauge family keyed by label values"""
+
+    def __init__(self, name, kind, help, labels=()):
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+        self._function = None
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels=(), amount=1):
+        self.inc(labels, -amount)
+
+    def set_function(self, function):
+        """Read the values at scrape time from function() -> {label values: value}"""
+        self._function = function
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        if self._function:
+            values = self._function()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for labels, value in sorted(values.items()):
+            lines.append(f"{self.name}{format_labels(self.labels, labels)} {value}")
+        return lines
+
+class Histogram:
+    """A histogram family keyed by label values"""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum, count
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {labels: (list(counts), total, count) for labels, (counts, total, count) in self._series.items()}
+        for labels, (counts, total, count) in sorted(series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{format_labels(self.labels + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, labels)} {count}")
+        return lines
+
+http_requests_in_flight = Metric("http_requests_in_flight", "gauge", "Requests being handled")
+http_request_duration = Histogram(
+    "http_request_duration_seconds", "Time to produce a response (first byte for streams)",
+    ("endpoint", "method", "status")
+)
+db_query_duration = Histogram("db_query_duration_seconds", "Time spent executing and fetching a query", ("operation",))
+db_query_rows = Histogram("db_query_rows", "Rows returned or affected per query", ("operation",), ROW_BUCKETS)
+db_query_errors = Metric("db_query_errors_total", "counter", "Queries that raised a database error", ("operation",))
+db_pool_acquire_duration = Histogram("db_pool_acquire_duration_seconds", "Time to borrow a pooled connection")
+db_pool_connections = Metric("db_pool_connections", "gauge", "Pooled connections by state", ("state",))
+
+METRICS = (
+    http_requests_in_flight, http_request_duration, db_query_duration, db_query_rows,
+    db_query_errors, db_pool_acquire_duration, db_pool_connections
+)
+
+def query_operation(query):
+    """Label a query by its leading keyword (SELECT, INSERT, ...)"""
+    return query.lstrip().split(None, 1)[0].upper()
+
+def observe_query(query, started, rows, params=None, connection=None):
+    """Record a finished query in the metrics, and in the slow-query log when over the threshold"""
+    duration = time.perf_counter() - started
+    operation = (query_operation(query),)
+    db_query_duration.observe(duration, operation)
+    # rowcount is -1 when the driver cannot tell
+    if isinstance(rows, int) and rows >= 0:
+        db_query_rows.observe(rows, operation)
+    if duration >= slow_query_log.threshold:
+        slow_query_log.record(query, params, duration, rows, connection)
+
+# Slow Query Log
+SLOW_QUERY_CONFIG = {
+    'threshold': float(os.environ.get('SLOW_QUERY_THRESHOLD', 0.2)),  # seconds
+    'max_entries': 200,       # most recent slow queries kept per worker
+    'explain_interval': 60    # seconds before the same statement is explained again
+}
+
+def describe_params(params):
+    """Shape of query parameters without their values, e.g. ["int", "str"] or "500 rows of [...]" """
+    if params is None:
+        return None
+    if isinstance(params, list) and params and isinstance(params[0], (tuple, list)):
+        return f"{len(params)} rows of [{', '.join(type(value).__name__ for value in params[0])}]"
+    return [type(value).__name__ for value in params]
+
+def plan_value(value):
+    return value if value is None or isinstance(value, (int, float, str)) else str(value)
+
+class SlowQueryLog:
+    """Bounded ring buffer of statements slower than threshold, with their EXPLAIN plans"""
+
+    def __init__(self, threshold, max_entries, explain_interval):
+        self.threshold = threshold
+        self.explain_interval = explain_interval
+        self._entries = collections.deque(maxlen=max_entries)
+        self._plans = collections.OrderedDict()   # query text -> (explained at, plan)
+        self._lock = threading.Lock()
+
+    def _explain(self, query, params, connection):
+        """EXPLAIN on the connection that ran the query, reusing a recent plan of the same text"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(query)
+        if cached and now - cached[0] < self.explain_interval:
+            return cached[1]
+
+        # executemany batches are explained with their first row
+        if isinstance(params, list):
+            params = params[0] if params else None
+        try:
+            cursor = connection.cursor(dictionary=True)
+            cursor.execute(f"EXPLAIN {query}", params)
+            plan = [{key: plan_value(value) for key, value in row.items()} for row in cursor.fetchall()]
+            cursor.close()
+        except mysql.connector.Error as e:
+            plan = [{"error": str(e)}]
+
+        with self._lock:
+            self._plans[query] = (now, plan)
+            self._plans.move_to_end(query)
+            while len(self._plans) > self._entries.maxlen:
+                self._plans.popitem(last=False)
+        return plan
+
+    def record(self, query, params, duration, rows, connection=None):
+        text = " ".join(query.split())
+        entry = {
+            "query": text,
+            "params": describe_params(params),
+            "duration_ms": round(duration * 1000, 3),
+            "rows": rows if isinstance(rows, int) else None,
+            "at": datetime.datetime.utcnow().isoformat() + "Z",
+            "plan": self._explain(text, params, connection) if connection is not None else None
+        }
+        logging.warning(f"Slow query ({entry['duration_ms']} ms): {text}")
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self):
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._entries))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._plans.clear()
+
+slow_query_log = SlowQueryLog(**SLOW_QUERY_CONFIG)
+
 # Database Connection Configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -29,23 +241,151 @@ DB_CONFIG = {
     'database': 'elective'
 }
 
+# Connection Pool Configuration
+DB_POOL_CONFIG = {
+    'pool_size': 10,           # maximum open connections per worker process
+    'checkout_timeout': 5.0,   # seconds to wait for a free connection
+    'recycle': 1800,           # seconds after which a connection is replaced
+    'ping_on_checkout': True   # check liveness before handing out an idle connection
+}
+
+
+class ConnectionPool:
+    """Thread-safe pool of reusable MySQL connections, rebuilt in each worker process"""
+
+    def __init__(self, db_config, pool_size=10, checkout_timeout=5.0, recycle=1800, ping_on_checkout=True):
+        self.db_config = db_config
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.recycle = recycle
+        self.ping_on_checkout = ping_on_checkout
+        self._reset()
+
+    def _reset(self):
+        """Forget every connection; used at start-up and in a freshly forked worker"""
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._idle = collections.deque()
+        self._checked_out = {}
+
+    def _check_pid(self):
+        # Sockets inherited from the parent process must never be shared, so a
+        # forked worker drops them (without closing) and opens its own.
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def _is_usable(self, connection, created_at):
+        if self.recycle and time.monotonic() - created_at > self.recycle:
+            return False
+        if self.ping_on_checkout:
+            try:
+                return bool(connection.is_connected())
+            except Exception:
+                return False
+        return True
+
+    def _close(self, connection):
+        try:
+            connection.close()
+        except Exception as e:
+            logging.debug(f"Error closing pooled connection: {e}")
+
+    def acquire(self):
+        """Borrow a connection, waiting up to checkout_timeout for a free slot"""
+        self._check_pid()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            logging.error("Timed out waiting for a database connection")
+            return None
+
+        while True:
+            with self._lock:
+                entry = self._idle.pop() if self._idle else None
+            if entry is None:
+                break
+            connection, created_at = entry
+            if self._is_usable(connection, created_at):
+                self._checked_out[id(connection)] = created_at
+                return connection
+            self._close(connection)
+
+        try:
+            connection = mysql.connector.connect(**self.db_config)
+        except mysql.connector.Error as e:
+            self._slots.release()
+            logging.error(f"Error connecting to MySQL Database: {e}")
+            return None
+        self._checked_out[id(connection)] = time.monotonic()
+        return connection
+
+    def release(self, connection, discard=False):
+        """Return a borrowed connection; broken connections should be discarded"""
+        if os.getpid() != self._pid:
+            return
+        created_at = self._checked_out.pop(id(connection), None)
+        if created_at is None:
+            return
+
+        if not discard:
+            try:
+                # End any open transaction so the next borrower gets a fresh snapshot
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        if discard:
+            self._close(connection)
+        else:
+            with self._lock:
+                self._idle.append((connection, created_at))
+        self._slots.release()
+
+    def dispose(self):
+        """Close idle connections and start over with an empty pool"""
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for connection, _ in idle:
+            self._close(connection)
+        self._reset()
+
+
+db_pool = ConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
+db_pool_connections.set_function(lambda: {("in_use",): len(db_pool._checked_out), ("idle",): len(db_pool._idle)})
+
+# Bulk insert limits
+BULK_MAX_ROWS = 50000
+BULK_BATCH_SIZE = 1000
+
 def get_db_connection():
-    """Create and return a database connection"""
+    """Borrow a database connection from the pool"""
+    started = time.perf_counter()
+    connection = db_pool.acquire()
+    db_pool_acquire_duration.observe(time.perf_counter() - started)
+    return connection
+
+def release_db_connection(connection, discard=False):
+    """Hand a connection back to the pool"""
+    db_pool.release(connection, discard=discard)
+
+def rollback_quietly(connection):
+    """Roll back a failed transaction on a connection that may already be broken"""
     try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except mysql.connector.Error as e:
-        print(f"Error connecting to MySQL Database: {e}")
-        return None
+        connection.rollback()
+    except Exception:
+        pass
 
-def execute_query(query, params=None, fetch=False):
+def execute_query(query, params=None, fetch=False, dictionary=True):
     """Execute a database query with optional parameters"""
     connection = get_db_connection()
     if not connection:
         return None
 
+    started = time.perf_counter()
+    # Anything but a clean finish discards the connection, so no error can leak a pool slot
+    discard = True
     try:
-        cursor = connection.cursor(dictionary=True)
+        cursor = connection.cursor(dictionary=dictionary)
         if params:
             cursor.execute(query, params)
         else:
@@ -56,71 +396,443 @@ def execute_query(query, params=None, fetch=False):
         else:
             connection.commit()
             result = cursor.rowcount
-        
         cursor.close()
-        connection.close()
+        discard = False
+        observe_query(query, started, len(result) if fetch else result, params, connection)
         return result
     except mysql.connector.Error as e:
+        db_query_errors.inc((query_operation(query),))
         logging.error(f"Database error: {e}")
-        if connection:
-            connection.close()
         return None
+    finally:
+        release_db_connection(connection, discard=discard)
     
 
-def load_users():
-    """Load users from JSON file or return an empty dict if in testing mode"""
-    if app.config['TESTING']:
-        return {}
+def execute_many(query, rows, batch_size=BULK_BATCH_SIZE, rollup=None, columns=None, errors=None):
+    """Run an INSERT for every row in batches of batch_size within one transaction
+
+    With a rollup, the inserted rows (tuples in columns order) are added to it in the same transaction.
+    A database error message is appended to errors, when given, before None is returned.
+    """
+    connection = get_db_connection()
+    if not connection:
+        return None
+
+    discard = True
     try:
-        with open(USER_DATA_FILE, "r") as file:
-            return json.load(file)
-    except FileNotFoundError:
-        return {}
-
-def save_users(users):
-    """Save users to JSON file only if not in testing mode"""
-    if app.config['TESTING']:
-        return
-    with open(USER_DATA_FILE, "w") as file:
-        json.dump(users, file)
+        cursor = connection.cursor()
+        written = 0
+        for start in range(0, len(rows), batch_size):
+            started = time.perf_counter()
+            batch = rows[start:start + batch_size]
+            # executemany folds an INSERT ... VALUES into one multi-row statement
+            cursor.executemany(query, batch)
+            if rollup:
+                deltas = rollup.row_deltas(batch, columns)
+                if deltas:
+                    cursor.executemany(rollup.row_delta_query, deltas)
+            observe_query(query, started, len(batch), batch, connection)
+            written += len(batch)
+        connection.commit()
+        cursor.close()
+        discard = False
+        return written
+    except mysql.connector.Error as e:
+        db_query_errors.inc((query_operation(query),))
+        logging.error(f"Database error: {e}")
+        if errors is not None:
+            errors.append(str(e))
+        return None
+    finally:
+        if discard:
+            rollback_quietly(connection)
+        release_db_connection(connection, discard=discard)
+
+
+def execute_transaction(statements):
+    """Run (query, params) statements in one transaction; returns their row counts, or None on failure"""
+    connection = get_db_connection()
+    if not connection:
+        return None
 
-users = load_users()
+    query = statements[0][0] if statements else "COMMIT"
+    discard = True
+    try:
+        cursor = connection.cursor()
+        counts = []
+        for query, params in statements:
+            started = time.perf_counter()
+            cursor.execute(query, params)
+            counts.append(cursor.rowcount)
+            observe_query(query, started, cursor.rowcount, params, connection)
+        connection.commit()
+        cursor.close()
+        discard = False
+        return counts
+    except mysql.connector.Error as e:
+        db_query_errors.inc((query_operation(query),))
+        logging.error(f"Database error: {e}")
+        return None
+    finally:
+        if discard:
+            rollback_quietly(connection)
+        release_db_connection(connection, discard=discard)
+
+# User Store
+class MySQLUserStore:
+    """Users in the `users` table, shared by every worker; reads and writes are primary-key operations"""
+
+    def get(self, username):
+        """Return {"password": hash, "role": role} for username, or None"""
+        rows = execute_query("SELECT password_hash, role FROM users WHERE username = %s", (username,), fetch=True)
+        if not rows:
+            return None
+        return {"password": rows[0]["password_hash"], "role": rows[0]["role"]}
+
+    def add(self, username, password_hash, role):
+        """Insert a user; returns True when added, False when the name is taken, None on failure"""
+        # The no-op update turns a duplicate into rowcount 0 instead of an error, so two
+        # workers registering the same name at once cannot both succeed
+        result = execute_query(
+            "INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE username = username",
+            (username, password_hash, role)
+        )
+        if result is None:
+            return None
+        return result == 1
+
+class MemoryUserStore:
+    """Process-local user store used in testing mode"""
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def get(self, username):
+        return self._users.get(username)
+
+    def add(self, username, password_hash, role):
+        with self._lock:
+            if username in self._users:
+                return False
+            self._users[username] = {"password": password_hash, "role": role}
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._users.clear()
+
+mysql_user_store = MySQLUserStore()
+memory_user_store = MemoryUserStore()
+
+def get_user_store():
+    """The users table, or an in-memory store when testing"""
+    return memory_user_store if app.config['TESTING'] else mysql_user_store
+
+# Latency Metrics
+class LatencyStats:
+    """Thread-safe count, mean and recent-window percentiles of observed durations"""
+
+    def __init__(self, window=1024):
+        self._recent = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds):
+        with self._lock:
+            self._recent.append(seconds)
+            self.count += 1
+            self.total += seconds
+
+    def snapshot(self):
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total = self.count, self.total
+        if not recent:
+            return {"count": count}
+        percentile = lambda q: round(recent[min(len(recent) - 1, int(q * len(recent)))] * 1000, 3)
+        return {
+            "count": count,
+            "mean_ms": round(total / count * 1000, 3),
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(recent[-1] * 1000, 3)
+        }
+
+# Password Hashing
+PASSWORD_HASH_CONFIG = {
+    'method': os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1'),  # werkzeug method; sets the work factor
+    'workers': 4,          # hashes computed at once per worker process
+    'max_pending': 64,     # running plus queued hashes before /login and /register answer 503
+    'timeout': 10.0        # seconds a request waits for its hash
+}
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash took longer than the timeout"""
+
+class PasswordHasher:
+    """Runs the deliberately slow password KDFs on a small bounded thread pool
+
+    hashlib's scrypt and PBKDF2 release the GIL, so request threads keep serving
+    other routes while hashes are computed; beyond max_pending callers are turned
+    away instead of queueing without limit.
+    """
+
+    def __init__(self, method, workers, max_pending, timeout):
+        self.method = method
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.latency = LatencyStats()
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+
+    def _get_executor(self):
+        # Threads do not survive fork, so each worker process starts its own pool
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Too many pending password hashes")
+
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # The slot is held until the hash finishes, even if the caller stopped waiting
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise PasswordHasherBusy("Password hashing timed out")
+        self.latency.observe(time.perf_counter() - started)
+        return result
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, password_hash, password):
+        return self._run(check_password_hash, password_hash, password)
+
+    def stats(self):
+        with self._lock:
+            rejected = self.rejected
+        return {
+            "method": self.method.split(":")[0],
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "rejected": rejected,
+            "latency": self.latency.snapshot()
+        }
+
+password_hasher = PasswordHasher(**PASSWORD_HASH_CONFIG)
 
 
 @auth.verify_password
 def verify_password(username, password):
     """Verify user password"""
-    if username in users and check_password_hash(users[username]['password'], password):
-        return username
+    user = get_user_store().get(username)
+    try:
+        if user and password_hasher.check(user['password'], password):
+            return username
+    except PasswordHasherBusy:
+        # Answer like /login does instead of failing with a 500
+        abort(app.make_response((jsonify({"error": "Server busy, try again shortly"}), 503, {"Retry-After": "1"})))
 
 def generate_token(identity, role):
     return create_access_token(identity=identity, additional_claims={"role": role, "username": identity})
 
 
+# Verified Token Cache
+TOKEN_CACHE_MAX_ENTRIES = 10000
+
+class VerifiedTokenCache:
+    """Bounded LRU of token digest -> claims for tokens whose signature was already checked"""
+
+    def __init__(self, max_entries=TOKEN_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        # Raw tokens are bearer credentials; only their digest is kept in memory
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token):
+        """Return the cached claims of an unexpired token, or None"""
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                # Expired: drop it so jwt.decode reports the expiry
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, claims):
+        key = self._key(token)
+        expires = claims.get("exp", float("inf"))
+        with self._lock:
+            self._entries[key] = (expires, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "max_entries": self.max_entries
+            }
+
+token_cache = VerifiedTokenCache()
+
+# Token Revocation
+REVOCATION_SYNC_INTERVAL = 5      # seconds a worker may lag behind revocations made by other workers
+REVOCATION_PRUNE_INTERVAL = 300   # seconds between deletions of expired rows from revoked_tokens
+
+class RevocationList:
+    """Revoked token ids (jti) shared through the revoked_tokens table and mirrored in every worker
+
+    Requests only test membership in the local frozenset. The set is replaced wholesale
+    from the unexpired rows of the table every sync_interval seconds, which also drops
+    tokens that have expired since.
+    """
+
+    def __init__(self, sync_interval=REVOCATION_SYNC_INTERVAL, prune_interval=REVOCATION_PRUNE_INTERVAL):
+        self.sync_interval = sync_interval
+        self.prune_interval = prune_interval
+        self._revoked = frozenset()
+        self._next_sync = 0.0
+        self._next_prune = 0.0
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti):
+        if time.monotonic() >= self._next_sync:
+            self.sync()
+        return jti in self._revoked
+
+    def revoke(self, jti, expires):
+        """Record a revocation until the token's exp; returns False when it could not be stored"""
+        # Held across the insert so a concurrent sync cannot replace the set with one read before it
+        with self._lock:
+            result = execute_query(
+                "INSERT INTO revoked_tokens (jti, expires_at) VALUES (%s, FROM_UNIXTIME(%s)) "
+                "ON DUPLICATE KEY UPDATE jti = jti",
+                (jti, expires)
+            )
+            if result is None:
+                return False
+            self._revoked = self._revoked | {jti}
+            return True
+
+    def sync(self):
+        """Reload the revoked ids; a request finding another thread syncing keeps the current set"""
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            now = time.monotonic()
+            self._next_sync = now + self.sync_interval
+            rows = execute_query(
+                "SELECT jti FROM revoked_tokens WHERE expires_at > NOW()", fetch=True, dictionary=False
+            )
+            if rows is not None:
+                self._revoked = frozenset(row[0] for row in rows)
+            if now >= self._next_prune:
+                self._next_prune = now + self.prune_interval
+                execute_query("DELETE FROM revoked_tokens WHERE expires_at <= NOW()")
+        finally:
+            self._lock.release()
+
+    def clear(self):
+        with self._lock:
+            self._revoked = frozenset()
+            self._next_sync = 0.0
+
+revocation_list = RevocationList()
+
+def decode_token(token):
+    """Verified claims of a token, from the cache when possible; raises jwt.InvalidTokenError"""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
+        token_cache.put(token, claims)
+    return claims
+
+def authenticate_request():
+    """Verify the request's bearer token and record its user on the request; returns (claims, error message)"""
+    token = request.headers.get("Authorization")
+    if not token:
+        logging.warning("Token is missing")
+        return None, "Token is missing"
+
+    # Extract the token from the "Bearer" prefix
+    token = token.split(" ")[1] if " " in token else token
+
+    try:
+        claims = decode_token(token)
+    except jwt.ExpiredSignatureError:
+        logging.warning("Token has expired")
+        return None, "Token has expired"
+    except jwt.InvalidTokenError as e:
+        logging.error(f"Invalid token: {e}")
+        return None, "Invalid token"
+
+    if not app.config["DISABLE_BLACKLIST_CHECK"] and revocation_list.is_revoked(claims.get("jti")):
+        return None, "Token has been revoked"
+
+    request.username = claims.get("username")
+    request.role = claims.get("role")
+    request.claims = claims
+    return claims, None
+
+def current_role():
+    """Role of the authenticated user; older tokens without one fall back to the user store"""
+    role = getattr(request, "role", None)
+    username = getattr(request, "username", None)
+    if not role and username:
+        user = get_user_store().get(username)
+        role = user.get("role") if user else None
+    return role
+
 def token_required(f):
     """Decorator to require JWT token for route access"""
     @wraps(f)
     def wrapper(*args, **kwargs):
-        token = request.headers.get("Authorization")
-        
-        if not token:
-            logging.warning("Token is missing")
-            return jsonify({"error": "Token is missing"}), 401
-
-        # Extract the token from the "Bearer" prefix
-        token = token.split(" ")[1] if " " in token else token
-
-        try:
-            decoded_token = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
-            request.username = decoded_token["username"]
-            logging.debug(f"Decoded token: {decoded_token}")
-        except jwt.ExpiredSignatureError:
-            logging.warning("Token has expired")
-            return jsonify({"error": "Token has expired"}), 401
-        except jwt.InvalidTokenError as e:
-            logging.error(f"Invalid token: {e}")
-            return jsonify({"error": "Invalid token"}), 401
-
+        _, error = authenticate_request()
+        if error:
+            return jsonify({"error": error}), 401
         return f(*args, **kwargs)
     return wrapper
 
@@ -129,14 +841,1177 @@ def role_required(required_roles):
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
-            username = getattr(request, "username", None)
-            user_role = users.get(username, {}).get("role")
+            user_role = current_role()
             if not user_role or user_role not in required_roles:
                 return jsonify({"error": "Access forbidden: insufficient permissions"}), 403
             return f(*args, **kwargs)
         return wrapper
     return decorator
 
+# JSON Serialization
+def json_dumps_stdlib(obj):
+    return json.dumps(obj, separators=(', ', ': '))
+
+# Encoders for response bodies. orjson is optional and several times faster, but
+# writes compact separators, so it is used only when JSON_BACKEND=orjson.
+JSON_BACKENDS = {"json": json_dumps_stdlib}
+try:
+    import orjson
+    JSON_BACKENDS["orjson"] = orjson.dumps
+except ImportError:
+    orjson = None
+
+JSON_BACKEND = os.environ.get("JSON_BACKEND", "json")
+if JSON_BACKEND not in JSON_BACKENDS:
+    raise ValueError(f"JSON_BACKEND must be one of {', '.join(sorted(JSON_BACKENDS))}, not {JSON_BACKEND!r}"
+                     + ("" if orjson or JSON_BACKEND != "orjson" else " (orjson is not installed)"))
+
+def json_dumps(obj):
+    """Encode obj with the configured JSON backend (str or bytes)"""
+    return JSON_BACKENDS[JSON_BACKEND](obj)
+
+def float_or_none(value):
+    return None if value is None else float(value)
+
+def str_or_none(value):
+    return None if value is None else str(value)
+
+# Per-type conversions applied by the row encoders. DATE columns use str(), which
+# matches date.isoformat() and keeps NULL dates rendered as "None" the way the
+# list routes always have.
+COLUMN_CONVERTERS = {
+    "date": str,
+    "decimal": float_or_none
+}
+
+# Exports and newer routes render NULL dates as JSON null, so their output can be imported again
+NULL_DATE_CONVERTERS = dict(COLUMN_CONVERTERS, date=str_or_none)
+
+class RowSerializer:
+    """Encodes rows of one table to JSON with converters chosen once per column"""
+
+    def __init__(self, columns, converters=COLUMN_CONVERTERS):
+        self.names = tuple(name for name, _, _ in columns)
+        self.types = tuple(column_type for _, column_type, _ in columns)
+        self.converters = converters
+        # (output name, key into the row, converter or None) for tuple and dictionary rows
+        self._tuple_fields = tuple(
+            (name, index, converters.get(column_type))
+            for index, (name, column_type) in enumerate(zip(self.names, self.types))
+        )
+        self._dict_fields = tuple((name, name, convert) for name, _, convert in self._tuple_fields)
+
+    def values(self, rows):
+        """Rows as tuples in column order; dictionary-cursor rows are reordered"""
+        if rows and isinstance(rows[0], dict):
+            names = self.names
+            return [tuple(row[name] for name in names) for row in rows]
+        return rows
+
+    def to_dicts(self, rows):
+        fields = self._dict_fields if rows and isinstance(rows[0], dict) else self._tuple_fields
+        return [
+            {name: convert(row[key]) if convert else row[key] for name, key, convert in fields}
+            for row in rows
+        ]
+
+    def dumps(self, rows):
+        """Encode rows as a JSON array"""
+        return json_dumps(self.to_dicts(rows))
+
+    def dumps_lines(self, rows):
+        """Encode rows as newline-delimited JSON"""
+        encoded = [json_dumps(row) for row in self.to_dicts(rows)]
+        newline = b"\n" if encoded and isinstance(encoded[0], bytes) else "\n"
+        return newline.join(encoded) + newline
+
+# Table Schemas
+class TableSchema:
+    """Columns of one table in database/elective.sql as (name, type, required)"""
+
+    def __init__(self, table, key_column, columns, date_column=None, filters=None, sort_columns=()):
+        self.table = table
+        self.key_column = key_column
+        self.date_column = date_column
+        self.columns = columns
+        # Query argument -> (SQL condition, value parser) accepted by the list endpoint
+        self.filters = filters or {}
+        # Columns the list endpoint may ORDER BY; each is backed by an index
+        self.sort_columns = (key_column,) + tuple(sort_columns)
+        self.column_names = tuple(name for name, _, _ in columns)
+        self.insert_columns = tuple(column for column in columns if column[0] != key_column)
+        self._serializers = {}
+        self.serializer = self.serializer_for(columns)
+        self.export_serializer = self.serializer_for(columns, null_dates=True)
+
+    def serializer_for(self, columns, null_dates=False):
+        """Serializer for a subset of columns, compiled once per distinct projection"""
+        key = (tuple(name for name, _, _ in columns), null_dates)
+        serializer = self._serializers.get(key)
+        if serializer is None:
+            converters = NULL_DATE_CONVERTERS if null_dates else COLUMN_CONVERTERS
+            serializer = self._serializers[key] = RowSerializer(columns, converters)
+        return serializer
+
+    def project(self, fields):
+        """Columns named in a ?fields=a,b value, in table order and always with the primary key"""
+        if not fields:
+            return self.columns
+        requested = {field.strip() for field in fields.split(",") if field.strip()}
+        unknown = requested - set(self.column_names)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        # The key stays first so keyset cursors and resumable exports keep working
+        requested.add(self.key_column)
+        return tuple(column for column in self.columns if column[0] in requested)
+
+ORDER_STATUSES = ('Pending', 'Completed', 'Shipped', 'Cancelled', 'In Progress')
+
+# Values each ENUM column accepts, checked before rows reach MySQL
+ENUM_VALUES = {"order_status": ORDER_STATUSES}
+
+def parse_int_arg(value):
+    return int(value)
+
+def parse_date_arg(value):
+    return datetime.date.fromisoformat(value).isoformat()
+
+def parse_order_status(value):
+    if value not in ORDER_STATUSES:
+        raise ValueError(value)
+    return value
+
+TABLE_SCHEMAS = {
+    "addresses": TableSchema("addresses", "address_id", (
+        ("address_id", "int", True),
+        ("number_building", "varchar(255)", True),
+        ("street", "varchar(255)", True),
+        ("city", "varchar(100)", True),
+        ("zip_postcode", "varchar(20)", True),
+        ("state_province_county", "varchar(100)", True),
+        ("country", "varchar(100)", True)
+    )),
+    "customers": TableSchema("customers", "customer_id", (
+        ("customer_id", "int", True),
+        ("address_id", "int", True),
+        ("customer_name", "varchar(255)", True),
+        ("customer_phone", "varchar(20)", True),
+        ("customer_email", "varchar(255)", False)
+    )),
+    "services": TableSchema("services", "service_id", (
+        ("service_id", "int", True),
+        ("service_name", "varchar(255)", True),
+        ("price_per_period", "decimal", True)
+    )),
+    "orders": TableSchema("customer_orders", "order_id", (
+        ("order_id", "int", True),
+        ("customer_id", "int", True),
+        ("order_status", "enum", True),
+        ("order_date", "date", True),
+        ("start_date", "date", True),
+        ("end_date", "date", False)
+    ), date_column="order_date", filters={
+        "status": ("order_status = %s", parse_order_status),
+        "customer_id": ("customer_id = %s", parse_int_arg),
+        "from": ("order_date >= %s", parse_date_arg),
+        "to": ("order_date <= %s", parse_date_arg)
+    }, sort_columns=("order_date",)),
+    "order_items": TableSchema("order_items", "order_item_id", (
+        ("order_item_id", "int", True),
+        ("order_id", "int", True),
+        ("service_id", "int", True),
+        ("order_quantity", "int", True),
+        ("monthly_payment_amount", "decimal", False),
+        ("monthly_payment_date", "date", False)
+    ), date_column="monthly_payment_date"),
+    "payments": TableSchema("customer_payment_details", "payment_id", (
+        ("payment_id", "int", True),
+        ("order_id", "int", True),
+        ("payment_date", "date", True),
+        ("payment_amount", "decimal", True),
+        ("payment_method", "varchar(50)", True),
+        ("transaction_reference", "varchar(255)", False)
+    ), date_column="payment_date", filters={
+        "order_id": ("order_id = %s", parse_int_arg),
+        "customer_id": ("order_id IN (SELECT order_id FROM customer_orders WHERE customer_id = %s)", parse_int_arg),
+        "payment_method": ("payment_method = %s", str),
+        "from": ("payment_date >= %s", parse_date_arg),
+        "to": ("payment_date <= %s", parse_date_arg)
+    }, sort_columns=("payment_date",))
+}
+
+# Keyset Pagination
+PAGE_DEFAULT_LIMIT = 100
+PAGE_MAX_LIMIT = 1000
+
+def encode_cursor(key, sort=None, value=None):
+    """Wrap the last row of a page (primary key, plus sort value for sorted lists) into an opaque cursor"""
+    payload = {"after": key}
+    if sort:
+        payload["sort"] = sort
+        payload["value"] = value
+    payload = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    """Recover the payload of a cursor produced by encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        key = payload["after"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(key, int) or isinstance(key, bool):
+        raise ValueError("Invalid cursor")
+    if not isinstance(payload.get("value"), (int, str, type(None))):
+        raise ValueError("Invalid cursor")
+    return payload
+
+def parse_page_args():
+    """Read ?limit= and ?after= from the request; returns (None, None) when not paginating"""
+    limit = request.args.get("limit")
+    after = request.args.get("after")
+    if limit is None and after is None:
+        return None, None
+
+    if limit is None:
+        limit = PAGE_DEFAULT_LIMIT
+    else:
+        try:
+            limit = int(limit)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if not 1 <= limit <= PAGE_MAX_LIMIT:
+            raise ValueError(f"limit must be between 1 and {PAGE_MAX_LIMIT}")
+
+    return limit, decode_cursor(after) if after else None
+
+def parse_sort(schema):
+    """Read ?sort=column or ?sort=-column; returns (column, descending), defaulting to the primary key"""
+    sort = request.args.get("sort")
+    if not sort:
+        return schema.key_column, False
+    descending = sort.startswith("-")
+    column = sort[1:] if descending else sort
+    if column not in schema.sort_columns:
+        raise ValueError(f"sort must be one of: {', '.join(schema.sort_columns)}")
+    return column, descending
+
+def parse_filters(schema):
+    """Turn the table's filter arguments into SQL conditions and parameters"""
+    conditions = []
+    params = []
+    for arg, (condition, parse) in schema.filters.items():
+        value = request.args.get(arg)
+        if value is None:
+            continue
+        try:
+            params.append(parse(value))
+        except ValueError:
+            raise ValueError(f"Invalid value for {arg}")
+        conditions.append(condition)
+    return conditions, params
+
+def paginate_query(query, key_column, limit, after, conditions=(), params=(), sort=None, descending=False):
+    """Add filters, a seek past the previous page and a look-ahead LIMIT to a SELECT"""
+    conditions = list(conditions)
+    params = list(params)
+    sort = sort or key_column
+    comparison = "<" if descending else ">"
+    direction = " DESC" if descending else ""
+
+    if after is not None:
+        if sort == key_column:
+            conditions.append(f"{key_column} {comparison} %s")
+            params.append(after["after"])
+        else:
+            # Expanded row comparison so MySQL can range-scan the (sort, key) index
+            conditions.append(f"({sort} {comparison} %s OR ({sort} = %s AND {key_column} {comparison} %s))")
+            params += [after["value"], after["value"], after["after"]]
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if sort == key_column:
+        query += f" ORDER BY {key_column}{direction}"
+    else:
+        query += f" ORDER BY {sort}{direction}, {key_column}{direction}"
+    if limit is not None:
+        query += " LIMIT %s"
+        params.append(limit + 1)
+    return query, tuple(params) or None
+
+def parse_ids_arg():
+    """Read ?ids=1,2,3 for a multi-get; returns a list of distinct primary keys or None"""
+    ids = request.args.get("ids")
+    if ids is None:
+        return None
+    try:
+        keys = list(dict.fromkeys(int(key) for key in ids.split(",") if key.strip()))
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if not 1 <= len(keys) <= PAGE_MAX_LIMIT:
+        raise ValueError(f"ids must list between 1 and {PAGE_MAX_LIMIT} keys")
+    return keys
+
+def split_page(rows, limit):
+    """Drop the look-ahead row; returns (rows, True when another page follows)"""
+    if limit is None or len(rows) <= limit:
+        return rows, False
+    return rows[:limit], True
+
+# Streaming Responses
+STREAM_CHUNK_SIZE = 1000
+
+def wants_stream():
+    """True when the client asked for a streamed response with ?stream=1"""
+    return request.args.get("stream", "").lower() in ("1", "true", "yes")
+
+class StreamingQuery:
+    """Unbuffered cursor that hands its pooled connection back once drained or closed"""
+
+    def __init__(self, connection, cursor):
+        self.connection = connection
+        self.cursor = cursor
+        self.exhausted = False
+
+    def chunks(self, chunk_size=STREAM_CHUNK_SIZE):
+        """Yield lists of up to chunk_size rows until the result set is drained"""
+        try:
+            while True:
+                rows = self.cursor.fetchmany(chunk_size)
+                if not rows:
+                    self.exhausted = True
+                    break
+                yield rows
+        finally:
+            self.close()
+
+    def close(self):
+        if self.connection is None:
+            return
+        # A connection with unread rows cannot be reused, so an aborted
+        # download costs one reconnect rather than draining the table.
+        try:
+            self.cursor.close()
+        except Exception:
+            self.exhausted = False
+        release_db_connection(self.connection, discard=not self.exhausted)
+        self.connection = None
+
+def open_streaming_query(query, params=None, dictionary=False):
+    """Run a query on an unbuffered cursor; returns (StreamingQuery, None) or (None, error_response)"""
+    connection = get_db_connection()
+    if not connection:
+        return None, (jsonify({"error": "Database unavailable"}), 503)
+
+    try:
+        cursor = connection.cursor(dictionary=dictionary, buffered=False)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+    except mysql.connector.Error as e:
+        logging.error(f"Database error: {e}")
+        release_db_connection(connection, discard=True)
+        return None, (jsonify({"error": "Failed to fetch rows"}), 500)
+    except Exception:
+        release_db_connection(connection, discard=True)
+        raise
+    return StreamingQuery(connection, cursor), None
+
+def streaming_response(stream, body, mimetype):
+    """Wrap a generator in a response that releases the stream even if it is never iterated"""
+    response = app.response_class(response=body, status=200, mimetype=mimetype)
+    response.call_on_close(stream.close)
+    return response
+
+def stream_json_response(query, serializer, params=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream a JSON array straight from an unbuffered cursor, chunk_size rows at a time"""
+    stream, error = open_streaming_query(query, params)
+    if error:
+        return error
+
+    def generate():
+        yield "["
+        separator = ""
+        for rows in stream.chunks(chunk_size):
+            # Each chunk is encoded as one array and its brackets dropped
+            yield separator
+            yield serializer.dumps(rows)[1:-1]
+            separator = ", "
+        yield "]"
+
+    return streaming_response(stream, generate(), 'application/json')
+
+def list_table_response(name, not_found, cache=None):
+    """Serve a list GET: the whole table, a keyset page (?limit=&after=) or a stream (?stream=1)"""
+    schema = TABLE_SCHEMAS[name]
+    try:
+        limit, after = parse_page_args()
+        columns = schema.project(request.args.get("fields"))
+        conditions, params = parse_filters(schema)
+        sort, descending = parse_sort(schema)
+        ids = parse_ids_arg()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if ids:
+        conditions.append(f"{schema.key_column} IN ({', '.join(['%s'] * len(ids))})")
+        params += ids
+
+    sort_arg = request.args.get("sort") if sort != schema.key_column else None
+    if after is not None and after.get("sort") != sort_arg:
+        return jsonify({"error": "Cursor does not match sort"}), 400
+
+    serializer = schema.serializer_for(columns)
+    # The sort column is read for the next cursor even when it is not projected
+    selected = serializer.names + ((sort,) if sort not in serializer.names else ())
+    query = f"SELECT {', '.join(selected)} FROM {schema.table}"
+
+    if wants_stream():
+        if limit is not None:
+            return jsonify({"error": "stream cannot be combined with limit or after"}), 400
+        query, params = paginate_query(query, schema.key_column, None, None, conditions, params, sort, descending)
+        return stream_json_response(query, serializer, params)
+
+    query, params = paginate_query(query, schema.key_column, limit, after, conditions, params, sort, descending)
+    load = lambda: execute_query(query, params, fetch=True, dictionary=False)
+    rows = cache.get_or_load((query, params), load) if cache else load()
+
+    if rows is None or (not rows and after is None):
+        return jsonify({"error": not_found}), 404
+    rows, has_more = split_page(rows, limit)
+
+    response = app.response_class(
+        response=serializer.dumps(rows),
+        status=200,
+        mimetype='application/json'
+    )
+    if has_more:
+        last = rows[-1]
+        if isinstance(last, dict):
+            key, value = last[schema.key_column], last[sort]
+        else:
+            # Tuple rows start with the primary key
+            key, value = last[0], last[selected.index(sort)]
+        if sort_arg and not isinstance(value, (int, str)):
+            value = str(value)
+        response.headers["X-Next-Cursor"] = encode_cursor(key, sort_arg, value if sort_arg else None)
+    return tag_by_content(response) if cache else response
+
+def get_row_response(name, key, not_found, cache=None):
+    """Serve a single-record GET with a primary-key lookup"""
+    schema = TABLE_SCHEMAS[name]
+    try:
+        columns = schema.project(request.args.get("fields"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    serializer = schema.serializer_for(columns)
+
+    query = f"SELECT {', '.join(serializer.names)} FROM {schema.table} WHERE {schema.key_column} = %s"
+    params = (key,)
+    load = lambda: execute_query(query, params, fetch=True, dictionary=False)
+    rows = cache.get_or_load((query, params), load) if cache else load()
+
+    if not rows:
+        return jsonify({"error": not_found}), 404
+    response = app.response_class(
+        response=json_dumps(serializer.to_dicts(rows[:1])[0]),
+        status=200,
+        mimetype='application/json'
+    )
+    return tag_by_content(response) if cache else response
+
+# Bulk Inserts
+def bulk_insert(name, validate, label):
+    """Validate a JSON array of rows and insert the valid ones in a single transaction
+
+    Rows are checked by validate and then converted column by column like imported
+    rows, so type and format errors are reported by index before the transaction opens.
+    """
+    schema = TABLE_SCHEMAS[name]
+    data = request.get_json(silent=True)
+    if not isinstance(data, list) or not data:
+        return jsonify({"error": "Request body must be a non-empty JSON array"}), 400
+    if len(data) > BULK_MAX_ROWS:
+        return jsonify({"error": f"At most {BULK_MAX_ROWS} rows per request"}), 413
+
+    rows = []
+    errors = []
+    for index, item in enumerate(data):
+        error = validate(item) if isinstance(item, dict) else "Row must be a JSON object"
+        if not error:
+            params, error = validate_import_row(item, schema.insert_columns)
+        if error:
+            errors.append({"index": index, "error": error})
+        else:
+            rows.append(params)
+
+    if not rows:
+        return jsonify({"error": "No valid rows to insert", "errors": errors}), 400
+
+    columns = tuple(column for column, _, _ in schema.insert_columns)
+    query = f"INSERT INTO {schema.table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    inserted = execute_many(query, rows, rollup=REVENUE_ROLLUPS.get(schema.table), columns=columns)
+    if inserted is None:
+        return jsonify({"error": f"Failed to add {label}", "errors": errors}), 500
+
+    return jsonify({
+        "message": f"{label.capitalize()} added successfully",
+        "inserted": inserted,
+        "errors": errors
+    }), 201
+
+# Streaming Imports
+IMPORT_CHUNK_SIZE = 5000
+IMPORT_MAX_REJECTED_REPORT = 1000
+IMPORT_JOB_HISTORY = 100
+
+IMPORT_SCHEMAS = {
+    "order_items": TABLE_SCHEMAS["order_items"],
+    "payments": TABLE_SCHEMAS["payments"]
+}
+
+# Jobs live in the process that ran them; with several workers, poll the worker that took the upload
+import_jobs = collections.OrderedDict()
+import_jobs_lock = threading.Lock()
+
+def convert_column(value, column_type, choices=()):
+    """Coerce a raw CSV/JSON value to a column type, raising ValueError if it does not fit"""
+    if column_type == "enum":
+        if value not in choices:
+            raise ValueError(f"must be one of {', '.join(choices)}")
+        return value
+    if column_type == "int":
+        if isinstance(value, (bool, float)) or not str(value).strip().lstrip("-").isdigit():
+            raise ValueError("must be an integer")
+        return int(value)
+    if column_type == "decimal":
+        try:
+            amount = Decimal(str(value).strip())
+        except ArithmeticError:
+            amount = None
+        if amount is None or not amount.is_finite() or amount.as_tuple().exponent < -2 or abs(amount) >= Decimal("1e8"):
+            raise ValueError("must be a decimal(10,2)")
+        return amount
+    if column_type == "date":
+        try:
+            return datetime.date.fromisoformat(str(value).strip()).isoformat()
+        except ValueError:
+            raise ValueError("must be a YYYY-MM-DD date")
+    if column_type.startswith("varchar("):
+        max_length = int(column_type[8:-1])
+        value = str(value)
+        if len(value) > max_length:
+            raise ValueError(f"must be at most {max_length} characters")
+        return value
+    raise ValueError(f"has unknown type {column_type}")
+
+def validate_import_row(row, columns):
+    """Return (params, None) for a valid row or (None, error) describing the first bad column"""
+    params = []
+    for name, column_type, required in columns:
+        value = row.get(name)
+        if value is None or value == "":
+            if required:
+                return None, f"{name} is required"
+            params.append(None)
+            continue
+        try:
+            params.append(convert_column(value, column_type, ENUM_VALUES.get(name, ())))
+        except ValueError as e:
+            return None, f"{name} {e}"
+    return tuple(params), None
+
+def iter_lines(stream, chunk_size=64 * 1024):
+    """Decode a binary stream into text lines without reading it all into memory"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        buffer += decoder.decode(chunk)
+        lines = buffer.split("\n")
+        buffer = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer
+
+def iter_import_records(stream, data_format):
+    """Yield (line_number, row_dict, error) for each record of a CSV or NDJSON stream"""
+    if data_format == "csv":
+        reader = csv.DictReader(iter_lines(stream))
+        for row in reader:
+            yield reader.line_num, row, None
+        return
+
+    for line_number, line in enumerate(iter_lines(stream), start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None, "Malformed JSON"
+            continue
+        if not isinstance(row, dict):
+            yield line_number, None, "Row must be a JSON object"
+            continue
+        yield line_number, row, None
+
+class ImportJob:
+    """Progress and rejected-rows report for one streaming import"""
+
+    def __init__(self, target, data_format):
+        self.id = uuid.uuid4().hex
+        self.target = target
+        self.format = data_format
+        self.status = "running"
+        self.rows_read = 0
+        self.inserted = 0
+        self.rejected = 0
+        self.rejected_rows = []
+        self.started_at = datetime.datetime.utcnow()
+        self.finished_at = None
+
+    def reject(self, line_number, error):
+        self.rejected += 1
+        if len(self.rejected_rows) < IMPORT_MAX_REJECTED_REPORT:
+            self.rejected_rows.append({"line": line_number, "error": error})
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "target": self.target,
+            "format": self.format,
+            "status": self.status,
+            "rows_read": self.rows_read,
+            "inserted": self.inserted,
+            "rejected": self.rejected,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None
+        }
+
+def register_import_job(job):
+    """Keep the most recent IMPORT_JOB_HISTORY jobs visible to the progress endpoints"""
+    with import_jobs_lock:
+        import_jobs[job.id] = job
+        while len(import_jobs) > IMPORT_JOB_HISTORY:
+            import_jobs.popitem(last=False)
+
+def run_import(target, stream, data_format, chunk_size=IMPORT_CHUNK_SIZE):
+    """Validate and load a CSV/NDJSON stream in chunked transactions, returning the finished job"""
+    schema = IMPORT_SCHEMAS[target]
+    columns = schema.insert_columns
+    names = [name for name, _, _ in columns]
+    query = f"INSERT INTO {schema.table} ({', '.join(names)}) VALUES ({', '.join(['%s'] * len(names))})"
+    job = ImportJob(target, data_format)
+    register_import_job(job)
+
+    batch = []
+    batch_lines = []
+
+    def insert(rows, lines):
+        """Insert rows in one transaction, bisecting a rejected batch so only the offending lines are reported"""
+        errors = []
+        if execute_many(query, rows, batch_size=chunk_size,
+                        rollup=REVENUE_ROLLUPS.get(schema.table), columns=columns, errors=errors) is not None:
+            job.inserted += len(rows)
+        elif not errors:
+            # No connection at all: retrying smaller batches would fail the same way
+            for line_number in lines:
+                job.reject(line_number, "Database unavailable")
+        elif len(rows) == 1:
+            job.reject(lines[0], f"Database rejected this row: {errors[0]}")
+        else:
+            middle = len(rows) // 2
+            insert(rows[:middle], lines[:middle])
+            insert(rows[middle:], lines[middle:])
+
+    def flush():
+        insert(batch[:], batch_lines[:])
+        batch.clear()
+        batch_lines.clear()
+
+    try:
+        for line_number, row, error in iter_import_records(stream, data_format):
+            job.rows_read += 1
+            if error is None:
+                params, error = validate_import_row(row, columns)
+            if error:
+                job.reject(line_number, error)
+                continue
+            batch.append(params)
+            batch_lines.append(line_number)
+            if len(batch) >= chunk_size:
+                flush()
+        if batch:
+            flush()
+        job.status = "completed"
+    except (UnicodeDecodeError, csv.Error) as e:
+        logging.error(f"Import {job.id} aborted: {e}")
+        job.status = "failed"
+    finally:
+        job.finished_at = datetime.datetime.utcnow()
+        # Chunks committed before a failure are visible too
+        if job.inserted:
+            for table in WRITE_TABLES[target]:
+                bump_table_version(table)
+    return job
+
+# Services Catalog Cache
+SERVICES_CACHE_TTL = 300          # seconds a cached catalog read stays fresh
+SERVICES_CACHE_MAX_ENTRIES = 1024
+
+class TTLCache:
+    """Thread-safe in-process cache with per-entry expiry, bounded size and hit/miss counters"""
+
+    def __init__(self, ttl, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by clear(); a load that started before a clear must not be stored
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss; None results are not cached"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            generation = self._generation
+
+        value = loader()
+        if value is not None:
+            with self._lock:
+                if generation != self._generation:
+                    return value
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        """Drop every entry, e.g. after a write to the underlying table"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "ttl": self.ttl
+            }
+
+services_cache = TTLCache(SERVICES_CACHE_TTL, SERVICES_CACHE_MAX_ENTRIES)
+
+# Customer Search
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+SEARCH_MIN_TOKEN_SIZE = 3   # InnoDB's innodb_ft_min_token_size; shorter words are not in the FULLTEXT index
+
+# Phone numbers are stored as typed ("(345)284-0290"). This expression must match the
+# functional index idx_customers_phone_digits in database/elective.sql exactly or MySQL
+# will not use it.
+PHONE_DIGITS_SQL = (
+    "REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE("
+    "customer_phone, '+', ''), '-', ''), '.', ''), ' ', ''), '(', ''), ')', '')"
+)
+
+def escape_like(value):
+    """Escape LIKE wildcards so user input only ever matches literally"""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def build_customer_search(q, limit):
+    """Plan an index-backed customer search for q; returns (query, params)"""
+    columns = ", ".join(TABLE_SCHEMAS["customers"].column_names)
+    prefix = escape_like(q) + "%"
+
+    if "@" in q:
+        # Email prefix: range scan on idx_customers_email
+        return (
+            f"SELECT {columns} FROM customers WHERE customer_email LIKE %s "
+            "ORDER BY customer_email, customer_id LIMIT %s",
+            (prefix, limit)
+        )
+
+    digits = re.sub(r"[\s()+.\-]", "", q)
+    if digits.isdigit() and len(digits) >= SEARCH_MIN_TOKEN_SIZE:
+        # Phone prefix on the separator-free number: range scan on idx_customers_phone_digits
+        return (
+            f"SELECT {columns} FROM customers WHERE {PHONE_DIGITS_SQL} LIKE %s ORDER BY customer_id LIMIT %s",
+            (digits + "%", limit)
+        )
+
+    words = [word for word in re.findall(r"\w+", q) if len(word) >= SEARCH_MIN_TOKEN_SIZE]
+    if not words:
+        # Too short for the FULLTEXT index: prefix of the whole name on idx_customers_name
+        return (
+            f"SELECT {columns} FROM customers WHERE customer_name LIKE %s "
+            "ORDER BY customer_name, customer_id LIMIT %s",
+            (prefix, limit)
+        )
+
+    # Every word must start a word of the name; names starting with q rank first,
+    # then FULLTEXT relevance
+    against = " ".join(f"+{word}*" for word in words)
+    return (
+        f"SELECT {columns} FROM customers WHERE MATCH(customer_name) AGAINST (%s IN BOOLEAN MODE) "
+        "ORDER BY customer_name LIKE %s DESC, MATCH(customer_name) AGAINST (%s IN BOOLEAN MODE) DESC, customer_id "
+        "LIMIT %s",
+        (against, prefix, against, limit)
+    )
+
+# Revenue Rollups
+class RevenueRollup:
+    """Daily revenue per dimension value, maintained from a source table inside each write's transaction"""
+
+    def __init__(self, table, source, day, dimension, amount, row_amount, amount_columns):
+        self.table = table
+        self.source = source
+        self.day = day
+        self.dimension = dimension
+        self.amount = amount                  # SQL over a stored source row
+        self.amount_columns = amount_columns  # insert columns feeding row_amount's placeholders
+        upsert = "ON DUPLICATE KEY UPDATE amount = amount + VALUES(amount), row_count = row_count + VALUES(row_count)"
+        self.row_delta_query = (
+            f"INSERT INTO {table} (day, {dimension}, amount, row_count) "
+            f"VALUES (%s, %s, COALESCE({row_amount}, 0), 1) {upsert}"
+        )
+        self._apply_query = (
+            f"INSERT INTO {table} (day, {dimension}, amount, row_count) "
+            f"SELECT {day}, {dimension}, {{sign}}COALESCE(SUM({amount}), 0), {{sign}}COUNT(*) FROM {source} "
+            f"WHERE {day} IS NOT NULL AND ({{condition}}) GROUP BY {day}, {dimension} {upsert}"
+        )
+
+    def add(self, condition):
+        """SQL adding the stored source rows matching condition to the rollup"""
+        return self._apply_query.format(sign="", condition=condition)
+
+    def remove(self, condition):
+        """SQL taking the stored source rows matching condition out of the rollup"""
+        return self._apply_query.format(sign="-", condition=condition)
+
+    def row_deltas(self, rows, columns):
+        """Parameters of row_delta_query for rows about to be inserted, given as tuples in columns order"""
+        names = [column[0] if isinstance(column, tuple) else column for column in columns]
+        day, dimension = names.index(self.day), names.index(self.dimension)
+        amount = [names.index(name) for name in self.amount_columns]
+        # Rows without a day belong to no bucket, matching the IS NOT NULL in add()
+        return [
+            (row[day], row[dimension], *(row[index] for index in amount))
+            for row in rows if row[day] is not None
+        ]
+
+# Keyed by source table. Amounts of new rows are cast like their DECIMAL(10,2) source
+# columns so the rollup sums exactly what the source table stores.
+REVENUE_ROLLUPS = {
+    "customer_payment_details": RevenueRollup(
+        "revenue_by_payment_method", "customer_payment_details", "payment_date", "payment_method",
+        "payment_amount", "CAST(%s AS DECIMAL(10,2))", ("payment_amount",)
+    ),
+    "order_items": RevenueRollup(
+        "revenue_by_service", "order_items", "monthly_payment_date", "service_id",
+        "order_quantity * monthly_payment_amount", "%s * CAST(%s AS DECIMAL(10,2))",
+        ("order_quantity", "monthly_payment_amount")
+    )
+}
+
+# /reports/revenue/<name> -> rollup it reads
+REVENUE_REPORTS = {
+    "payment_methods": REVENUE_ROLLUPS["customer_payment_details"],
+    "services": REVENUE_ROLLUPS["order_items"]
+}
+
+# Request Latency
+# Auth routes are dominated by password hashing, so they are tracked apart from
+# data routes to keep one from hiding regressions in the other.
+# Flask runs after_request hooks in reverse registration order, so this section
+# comes before the version bump, compression and profiling hooks: the latency
+# hook then runs last and the recorded time includes their work.
+AUTH_ENDPOINTS = {"register", "login", "logout", "revoke_token"}
+request_latency = {"auth": LatencyStats(), "data": LatencyStats()}
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.in_flight = True
+    http_requests_in_flight.inc()
+
+@app.after_request
+def record_request_latency(response):
+    """Record the request time up to the finished response (time to first byte for streamed ones)"""
+    started = g.pop("request_started", None)
+    if started is not None:
+        elapsed = time.perf_counter() - started
+        # Unmatched paths share one label so 404 scans cannot grow the series without bound
+        endpoint = request.endpoint or "unmatched"
+        http_request_duration.observe(elapsed, (endpoint, request.method, str(response.status_code)))
+        if request.endpoint:
+            group = "auth" if request.endpoint in AUTH_ENDPOINTS else "data"
+            request_latency[group].observe(elapsed)
+    return response
+
+@app.teardown_request
+def finish_request(exception=None):
+    # Request contexts that never ran the before_request hooks were never counted
+    if g.pop("in_flight", False):
+        http_requests_in_flight.dec()
+
+# Conditional GET
+# Tables whose rows may change when a write hits the given path segment,
+# following the ON DELETE/UPDATE CASCADE foreign keys in database/elective.sql.
+WRITE_TABLES = {
+    "addresses": ("addresses",),
+    "customers": ("customers", "customer_orders", "customer_payment_details"),
+    "services": ("services",),
+    "orders": ("customer_orders", "customer_payment_details"),
+    "order_items": ("order_items",),
+    "payments": ("customer_payment_details",)
+}
+
+def get_table_versions(tables):
+    """Read the shared version counters of some tables as one string; None when they cannot be read"""
+    rows = execute_query(
+        f"SELECT table_name, version FROM table_versions WHERE table_name IN ({', '.join(['%s'] * len(tables))})",
+        tuple(tables),
+        fetch=True
+    )
+    if rows is None:
+        return None
+    versions = {row["table_name"]: row["version"] for row in rows}
+    return ",".join(f"{table}:{versions.get(table, 0)}" for table in tables)
+
+def bump_table_version(table):
+    """Invalidate every ETag issued for a table"""
+    execute_query(
+        "INSERT INTO table_versions (table_name, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1",
+        (table,)
+    )
+
+def not_modified_response(etag):
+    """A 304 when If-None-Match names etag or one of its compressed variants, otherwise None"""
+    # Compressed representations carry the encoding as a suffix
+    for candidate in [etag] + [f"{etag}-{encoding}" for encoding in COMPRESSION_ENCODINGS]:
+        if request.if_none_match.contains(candidate):
+            response = app.response_class(status=304)
+            response.set_etag(candidate)
+            return response
+    return None
+
+def tag_by_content(response):
+    """ETag a response by its body, for routes served from a per-worker cache
+
+    The table version would not do there: it changes on every worker at once while
+    each worker's cache only expires on its own, so the tag could outlive the rows.
+    """
+    etag = hashlib.sha1(response.get_data()).hexdigest()[:20]
+    not_modified = not_modified_response(etag)
+    if not_modified:
+        return not_modified
+    response.set_etag(etag)
+    return response
+
+def conditional_get(*tables):
+    """Decorator answering If-None-Match with 304 while the versions of the tables are unchanged"""
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            versions = get_table_versions(tables)
+            if versions is None:
+                return f(*args, **kwargs)
+
+            # The query string is part of the tag so each page/format gets its own
+            etag = hashlib.sha1(f"{versions}:{request.full_path}".encode()).hexdigest()[:20]
+            not_modified = not_modified_response(etag)
+            if not_modified:
+                return not_modified
+
+            response = app.make_response(f(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+@app.after_request
+def bump_versions_after_write(response):
+    """Bump table versions after any POST/PUT/DELETE that reached a route handler and succeeded"""
+    if request.method not in ("POST", "PUT", "DELETE") or response.status_code >= 400:
+        return response
+    # Imports bump their own tables in run_import, which also serves the CLI
+    segments = request.path.strip("/").split("/")
+    for table in WRITE_TABLES.get(segments[0], ()):
+        bump_table_version(table)
+    return response
+
+# Response Compression
+COMPRESSION_CONFIG = {
+    'min_size': 1024,   # bytes; smaller buffered bodies are sent as-is
+    'level': 6,         # zlib level, 1 (fastest) to 9 (smallest)
+    'mimetypes': ('application/json', 'application/x-ndjson', 'text/csv')
+}
+# zlib window bits selecting the container for each Content-Encoding
+COMPRESSION_ENCODINGS = {"gzip": 16 + zlib.MAX_WBITS, "deflate": zlib.MAX_WBITS}
+
+def compress_stream(chunks, compressor):
+    """Compress a streamed body chunk by chunk, flushing so clients can decode as rows arrive"""
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON/CSV/NDJSON bodies with gzip or deflate when the client accepts it"""
+    if response.mimetype not in COMPRESSION_CONFIG['mimetypes'] or "Content-Encoding" in response.headers:
+        return response
+    response.vary.add("Accept-Encoding")
+    if response.status_code != 200 or response.direct_passthrough:
+        return response
+
+    encoding = request.accept_encodings.best_match(list(COMPRESSION_ENCODINGS))
+    if not encoding:
+        return response
+
+    compressor = zlib.compressobj(COMPRESSION_CONFIG['level'], zlib.DEFLATED, COMPRESSION_ENCODINGS[encoding])
+    if response.is_streamed:
+        response.response = compress_stream(response.iter_encoded(), compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESSION_CONFIG['min_size']:
+            return response
+        response.set_data(compressor.compress(data) + compressor.flush())
+
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+# Request Profiling
+PROFILE_CONFIG = {
+    'sample_every': int(os.environ.get('PROFILE_SAMPLE_EVERY', 0)),  # profile 1 in N requests; 0 disables
+    'interval': 0.001,     # seconds between stack samples
+    'max_profiles': 50     # most recent profiles kept per worker
+}
+
+class StackSampler:
+    """Samples one thread's Python stack from a background thread, counting collapsed stacks"""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling and return the profile in collapsed-stack format (flamegraph.pl, speedscope)"""
+        self._stop.set()
+        self._thread.join()
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class DeterministicProfiler:
+    """cProfile around one request, reported as pstats text sorted by cumulative time"""
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        output = io.StringIO()
+        pstats.Stats(self._profile, stream=output).sort_stats("cumulative").print_stats(60)
+        return output.getvalue()
+
+profiles = collections.OrderedDict()
+profiles_lock = threading.Lock()
+profile_counter = itertools.count(1)
+
+def requested_profile_mode():
+    """stacks/cprofile when an admin asked for a profile of this request, else None"""
+    mode = request.headers.get("X-Profile") or request.args.get("profile")
+    if not mode:
+        return None
+    mode = "cprofile" if mode == "cprofile" else "stacks"
+    # The same checks as token_required and role_required(["admin"])
+    _, error = authenticate_request()
+    if error:
+        return None
+    return mode if current_role() == "admin" else None
+
+@app.before_request
+def start_profiling():
+    mode = requested_profile_mode()
+    sample_every = PROFILE_CONFIG['sample_every']
+    if mode is None and sample_every and next(profile_counter) % sample_every == 0:
+        mode = "stacks"
+    if mode is None:
+        return
+    profiler = DeterministicProfiler() if mode == "cprofile" else StackSampler(threading.get_ident(), PROFILE_CONFIG['interval'])
+    g.profile = (mode, profiler, time.perf_counter())
+    profiler.start()
+
+@app.after_request
+def finish_profiling(response):
+    """Store the profile of this request (handler time only for streamed bodies)"""
+    profile = g.pop("profile", None)
+    if profile is None:
+        return response
+    mode, profiler, started = profile
+    output = profiler.stop()
+    profile_id = uuid.uuid4().hex[:12]
+    with profiles_lock:
+        profiles[profile_id] = {
+            "id": profile_id,
+            "mode": mode,
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+            "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+            "at": datetime.datetime.utcnow().isoformat() + "Z",
+            "profile": output
+        }
+        while len(profiles) > PROFILE_CONFIG['max_profiles']:
+            profiles.popitem(last=False)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
 # Register Route
 @app.route("/register", methods=["POST"])
 def register():
@@ -147,16 +2022,25 @@ def register():
     password = data.get("password")
     role = data.get("role", "admin")
 
-    if username in users:
-        return jsonify({"error": "User already exists"}), 400
-
     if not username or not password:
         return jsonify({"error": "Username and password are required"}), 400
 
+    # Taken names are turned away before they can spend a slot in the hashing pool
+    user_store = get_user_store()
+    if user_store.get(username):
+        return jsonify({"error": "User already exists"}), 409
+
     # Hash the password and save the user
-    hashed_password = generate_password_hash(password)
-    users[username] = {"password": hashed_password, "role": role}
-    save_users(users)
+    try:
+        hashed_password = password_hasher.hash(password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
+    added = user_store.add(username, hashed_password, role)
+    if added is None:
+        return jsonify({"error": "Failed to register user"}), 500
+    if not added:
+        # Registered by a concurrent request after the check above
+        return jsonify({"error": "User already exists"}), 409
 
     return jsonify({"message": "User registered successfully"}), 201
 
@@ -176,39 +2060,59 @@ def login():
     if not username or not password:
         return jsonify({"error": "Username and password are required"}), 400
 
-    if username not in users or not check_password_hash(users[username]['password'], password):
+    user = get_user_store().get(username)
+    if not user:
+        return jsonify({"error": "Invalid credentials"}), 401
+    try:
+        valid = password_hasher.check(user['password'], password)
+    except PasswordHasherBusy:
+        return jsonify({"error": "Server busy, try again shortly"}), 503, {"Retry-After": "1"}
+    if not valid:
         return jsonify({"error": "Invalid credentials"}), 401
 
-    token = generate_token(username, users[username]['role'])
+    token = generate_token(username, user['role'])
     return jsonify({"token": token}), 200
 
+# Logout Route
+@app.route("/logout", methods=["POST"])
+@token_required
+def logout():
+    claims = request.claims
+    if not claims.get("jti") or not claims.get("exp"):
+        return jsonify({"error": "Token cannot be revoked"}), 400
+    if not revocation_list.revoke(claims["jti"], claims["exp"]):
+        return jsonify({"error": "Failed to revoke token"}), 500
+    return jsonify({"message": "Logged out successfully"}), 200
+
+# Revoke another user's token
+@app.route("/tokens/revoke", methods=["POST"])
+@token_required
+@role_required(["admin"])
+def revoke_token():
+    data = request.get_json(silent=True) or {}
+    token = data.get("token")
+    if not token:
+        return jsonify({"error": "token is required"}), 400
+
+    try:
+        claims = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])
+    except jwt.ExpiredSignatureError:
+        return jsonify({"message": "Token has already expired"}), 200
+    except jwt.InvalidTokenError:
+        return jsonify({"error": "Invalid token"}), 400
+    if not claims.get("jti") or not claims.get("exp"):
+        return jsonify({"error": "Token cannot be revoked"}), 400
+
+    if not revocation_list.revoke(claims["jti"], claims["exp"]):
+        return jsonify({"error": "Failed to revoke token"}), 500
+    return jsonify({"message": "Token revoked successfully"}), 200
+
 
 # CRUD operations for Addresses
 @app.route("/addresses", methods=["GET"])
+@conditional_get("addresses")
 def get_all_addresses():
-    query = "SELECT * FROM addresses"
-    addresses = execute_query(query, fetch=True)
-    
-    if not addresses:
-        return jsonify({"error": "No addresses found"}), 404
-    
-    formatted_addresses = [
-        {
-            "address_id": address["address_id"],
-            "number_building": address["number_building"],
-            "street": address["street"],
-            "city": address["city"],
-            "zip_postcode": address["zip_postcode"],
-            "state_province_county": address["state_province_county"],
-            "country": address["country"]
-        }
-        for address in addresses
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_addresses, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("addresses", "No addresses found")
 
 @app.route("/addresses", methods=["POST"])
 @token_required
@@ -243,6 +2147,11 @@ def add_address():
         return jsonify({"error": "An error occurred while adding address"}), 500
     
 
+@app.route("/addresses/<int:address_id>", methods=["GET"])
+@conditional_get("addresses")
+def get_address(address_id):
+    return get_row_response("addresses", address_id, "Address not found")
+
 @app.route("/addresses/<int:address_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -285,28 +2194,15 @@ def delete_address(address_id):
 
 # CRUD operations for Customers
 @app.route("/customers", methods=["GET"])
+@conditional_get("customers")
 def get_all_customers():
-    query = "SELECT * FROM customers"
-    customers = execute_query(query, fetch=True)
-    
-    if not customers:
-        return jsonify({"error": "No customers found"}), 404
-    
-    formatted_customers = [
-        {
-            "customer_id": customer["customer_id"],
-            "address_id": customer["address_id"],
-            "customer_name": customer["customer_name"],
-            "customer_phone": customer["customer_phone"],
-            "customer_email": customer["customer_email"]
-        }
-        for customer in customers
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_customers, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("customers", "No customers found")
+
+def validate_customer(data):
+    """Return an error message for an invalid customer payload, or None"""
+    if not data.get("address_id") or not data.get("customer_name") or not data.get("customer_phone"):
+        return "Required fields missing"
+    return None
 
 @app.route("/customers", methods=["POST"])
 @token_required
@@ -319,8 +2215,9 @@ def add_customer():
     customer_email = data.get("customer_email")
 
     # Validation
-    if not address_id or not customer_name or not customer_phone:
-        return jsonify({"error": "Required fields missing"}), 400
+    error = validate_customer(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     query = """
     INSERT INTO customers (address_id, customer_name, customer_phone, customer_email) 
@@ -339,6 +2236,103 @@ def add_customer():
         logging.error(f"Error adding customer: {e}")
         return jsonify({"error": "An error occurred while adding customer"}), 500
 
+@app.route("/customers/bulk", methods=["POST"])
+@token_required
+@role_required(["staff", "admin"])
+def add_customers_bulk():
+    return bulk_insert("customers", validate_customer, "customers")
+
+@app.route("/customers/search", methods=["GET"])
+@conditional_get("customers")
+def search_customers():
+    q = request.args.get("q", "").strip()
+    if not q:
+        return jsonify({"error": "q is required"}), 400
+    try:
+        limit = int(request.args.get("limit", SEARCH_DEFAULT_LIMIT))
+    except ValueError:
+        return jsonify({"error": "limit must be an integer"}), 400
+    if not 1 <= limit <= SEARCH_MAX_LIMIT:
+        return jsonify({"error": f"limit must be between 1 and {SEARCH_MAX_LIMIT}"}), 400
+
+    query, params = build_customer_search(q, limit)
+    rows = execute_query(query, params, fetch=True, dictionary=False)
+    if rows is None:
+        return jsonify({"error": "Failed to search customers"}), 500
+    return app.response_class(
+        response=TABLE_SCHEMAS["customers"].serializer.dumps(rows),
+        status=200,
+        mimetype='application/json'
+    )
+
+@app.route("/customers/<int:customer_id>", methods=["GET"])
+@conditional_get("customers")
+def get_customer(customer_id):
+    return get_row_response("customers", customer_id, "Customer not found")
+
+@app.route("/customers/<int:customer_id>/overview", methods=["GET"])
+@conditional_get("customers", "addresses", "customer_orders", "order_items", "services", "customer_payment_details")
+def get_customer_overview(customer_id):
+    try:
+        depth = int(request.args.get("depth", 2))
+    except ValueError:
+        return jsonify({"error": "depth must be 0, 1 or 2"}), 400
+    if depth not in (0, 1, 2):
+        return jsonify({"error": "depth must be 0, 1 or 2"}), 400
+
+    schemas = {name: TABLE_SCHEMAS[name] for name in ("customers", "addresses", "orders", "order_items", "services", "payments")}
+    address_columns = [f"a.{name}" for name in schemas["addresses"].column_names if name != "address_id"]
+    customers = execute_query(
+        f"SELECT {', '.join('c.' + name for name in schemas['customers'].column_names)}, {', '.join(address_columns)} "
+        "FROM customers c JOIN addresses a ON a.address_id = c.address_id WHERE c.customer_id = %s",
+        (customer_id,),
+        fetch=True
+    )
+    if not customers:
+        return jsonify({"error": "Customer not found"}), 404
+
+    overview = {
+        "customer": schemas["customers"].export_serializer.to_dicts(customers)[0],
+        "address": schemas["addresses"].export_serializer.to_dicts(customers)[0]
+    }
+
+    # Each level is one set-based query keyed on the customer, never one per order
+    if depth >= 1:
+        orders = execute_query(
+            f"SELECT {', '.join(schemas['orders'].column_names)} FROM customer_orders "
+            "WHERE customer_id = %s ORDER BY order_id",
+            (customer_id,),
+            fetch=True
+        ) or []
+        payments = execute_query(
+            f"SELECT {', '.join(schemas['payments'].column_names)} FROM customer_payment_details "
+            "WHERE order_id IN (SELECT order_id FROM customer_orders WHERE customer_id = %s) ORDER BY payment_id",
+            (customer_id,),
+            fetch=True
+        ) or []
+        overview["orders"] = schemas["orders"].export_serializer.to_dicts(orders)
+        overview["payments"] = schemas["payments"].export_serializer.to_dicts(payments)
+
+    if depth >= 2:
+        item_columns = [f"oi.{name}" for name in schemas["order_items"].column_names]
+        items = execute_query(
+            f"SELECT {', '.join(item_columns)}, s.service_name, s.price_per_period FROM order_items oi "
+            "JOIN services s ON s.service_id = oi.service_id "
+            "WHERE oi.order_id IN (SELECT order_id FROM customer_orders WHERE customer_id = %s) "
+            "ORDER BY oi.order_item_id",
+            (customer_id,),
+            fetch=True
+        ) or []
+        items_by_order = collections.defaultdict(list)
+        for item, service in zip(schemas["order_items"].export_serializer.to_dicts(items),
+                                 schemas["services"].export_serializer.to_dicts(items)):
+            item["service"] = service
+            items_by_order[item["order_id"]].append(item)
+        for order in overview["orders"]:
+            order["items"] = items_by_order.get(order["order_id"], [])
+
+    return app.response_class(response=json_dumps(overview), status=200, mimetype='application/json')
+
 @app.route("/customers/<int:customer_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -368,8 +2362,14 @@ def update_customer(customer_id):
 def delete_customer(customer_id):
     query = "DELETE FROM customers WHERE customer_id=%s"
     params = (customer_id,)
+    rollup = REVENUE_ROLLUPS["customer_payment_details"]
     
-    result = execute_query(query, params)
+    # Payments go with the customer's orders through ON DELETE CASCADE, which bypasses the rollup
+    counts = execute_transaction([
+        (rollup.remove("order_id IN (SELECT order_id FROM customer_orders WHERE customer_id = %s)"), params),
+        (query, params)
+    ])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Customer deleted successfully"}), 200
@@ -380,25 +2380,7 @@ def delete_customer(customer_id):
 # CRUD operations for Services
 @app.route("/services", methods=["GET"])
 def get_all_services():
-    query = "SELECT * FROM services"
-    services = execute_query(query, fetch=True)
-    
-    if not services:
-        return jsonify({"error": "No services found"}), 404
-    
-    formatted_services = [
-        {
-            "service_id": service["service_id"],
-            "service_name": service["service_name"],
-            "price_per_period": float(service["price_per_period"])
-        }
-        for service in services
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_services, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("services", "No services found", cache=services_cache)
 
 @app.route("/services", methods=["POST"])
 @token_required
@@ -419,6 +2401,7 @@ def add_service():
     
     try:
         result = execute_query(query, params)
+        services_cache.clear()
         
         if result is not None and result >= 0:
             return jsonify({"message": "Service added successfully"}), 201
@@ -428,6 +2411,10 @@ def add_service():
         logging.error(f"Error adding service: {e}")
         return jsonify({"error": "An error occurred while adding service"}), 500
 
+@app.route("/services/<int:service_id>", methods=["GET"])
+def get_service(service_id):
+    return get_row_response("services", service_id, "Service not found", cache=services_cache)
+
 @app.route("/services/<int:service_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -442,6 +2429,7 @@ def update_service(service_id):
     params = (service_name, price_per_period, service_id)
     
     result = execute_query(query, params)
+    services_cache.clear()
     
     if result:
         return jsonify({"message": "Service updated successfully"}), 200
@@ -456,6 +2444,7 @@ def delete_service(service_id):
     params = (service_id,)
     
     result = execute_query(query, params)
+    services_cache.clear()
     
     if result:
         return jsonify({"message": "Service deleted successfully"}), 200
@@ -465,29 +2454,15 @@ def delete_service(service_id):
 
 # CRUD operations for Customer_Orders
 @app.route("/orders", methods=["GET"])
+@conditional_get("customer_orders")
 def get_all_orders():
-    query = "SELECT * FROM customer_orders"
-    orders = execute_query(query, fetch=True)
-    
-    if not orders:
-        return jsonify({"error": "No orders found"}), 404
-    
-    formatted_orders = [
-        {
-            "order_id": order["order_id"],
-            "customer_id": order["customer_id"],
-            "order_status": order["order_status"],
-            "order_date": order["order_date"].isoformat() if isinstance(order["order_date"], datetime.date) else str(order["order_date"]),
-            "start_date": order["start_date"].isoformat() if isinstance(order["start_date"], datetime.date) else str(order["start_date"]),
-            "end_date": order["end_date"].isoformat() if isinstance(order["end_date"], datetime.date) else str(order["end_date"])
-        }
-        for order in orders
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_orders, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("orders", "No orders found")
+
+def validate_order(data):
+    """Return an error message for an invalid order payload, or None"""
+    if not data.get("customer_id") or not data.get("order_status") or not data.get("order_date") or not data.get("start_date"):
+        return "Required fields missing"
+    return None
 
 @app.route("/orders", methods=["POST"])
 @token_required
@@ -500,8 +2475,9 @@ def add_order():
     start_date = data.get("start_date")
     end_date = data.get("end_date")
 
-    if not customer_id or not order_status or not order_date or not start_date:
-        return jsonify({"error": "Required fields missing"}), 400
+    error = validate_order(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     query = """
     INSERT INTO customer_orders (customer_id, order_status, order_date, start_date, end_date) 
@@ -520,6 +2496,17 @@ def add_order():
         logging.error(f"Error adding order: {e}")
         return jsonify({"error": "An error occurred while adding order"}), 500
     
+@app.route("/orders/bulk", methods=["POST"])
+@token_required
+@role_required(["staff", "admin"])
+def add_orders_bulk():
+    return bulk_insert("orders", validate_order, "orders")
+
+@app.route("/orders/<int:order_id>", methods=["GET"])
+@conditional_get("customer_orders")
+def get_order(order_id):
+    return get_row_response("orders", order_id, "Order not found")
+
 @app.route("/orders/<int:order_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -550,8 +2537,11 @@ def update_order(order_id):
 def delete_order(order_id):
     query = "DELETE FROM customer_orders WHERE order_id=%s"
     params = (order_id,)
+    rollup = REVENUE_ROLLUPS["customer_payment_details"]
     
-    result = execute_query(query, params)
+    # Payments go with the order through ON DELETE CASCADE, which bypasses the rollup
+    counts = execute_transaction([(rollup.remove("order_id = %s"), params), (query, params)])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Order deleted successfully"}), 200
@@ -561,29 +2551,15 @@ def delete_order(order_id):
 
 # CRUD operations for Order_Items
 @app.route("/order_items", methods=["GET"])
+@conditional_get("order_items")
 def get_all_order_items():
-    query = "SELECT * FROM order_items"
-    order_items = execute_query(query, fetch=True)
-    
-    if not order_items:
-        return jsonify({"error": "No order items found"}), 404
-    
-    formatted_order_items = [
-        {
-            "order_item_id": item["order_item_id"],
-            "order_id": item["order_id"],
-            "service_id": item["service_id"],
-            "order_quantity": item["order_quantity"],
-            "monthly_payment_amount": float(item["monthly_payment_amount"]) if isinstance(item["monthly_payment_amount"], Decimal) else item["monthly_payment_amount"],
-            "monthly_payment_date": item["monthly_payment_date"].isoformat() if isinstance(item["monthly_payment_date"], datetime.date) else str(item["monthly_payment_date"])
-        }
-        for item in order_items
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_order_items, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("order_items", "No order items found")
+
+def validate_order_item(data):
+    """Return an error message for an invalid order item payload, or None"""
+    if not data.get("order_id") or not data.get("service_id") or not data.get("order_quantity"):
+        return "Required fields missing"
+    return None
 
 @app.route("/order_items", methods=["POST"])
 @token_required
@@ -596,17 +2572,20 @@ def add_order_item():
     monthly_payment_amount = data.get("monthly_payment_amount")
     monthly_payment_date = data.get("monthly_payment_date")
 
-    if not order_id or not service_id or not order_quantity:
-        return jsonify({"error": "Required fields missing"}), 400
+    error = validate_order_item(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     query = """
     INSERT INTO order_items (order_id, service_id, order_quantity, monthly_payment_amount, monthly_payment_date) 
     VALUES (%s, %s, %s, %s, %s)
     """
     params = (order_id, service_id, order_quantity, monthly_payment_amount, monthly_payment_date)
+    rollup = REVENUE_ROLLUPS["order_items"]
     
     try:
-        result = execute_query(query, params)
+        counts = execute_transaction([(query, params), (rollup.add("order_item_id = LAST_INSERT_ID()"), None)])
+        result = counts[0] if counts else None
         
         if result is not None and result >= 0:
             return jsonify({"message": "Order item added successfully"}), 201
@@ -616,6 +2595,17 @@ def add_order_item():
         logging.error(f"Error adding order item: {e}")
         return jsonify({"error": "An error occurred while adding order item"}), 500
 
+@app.route("/order_items/bulk", methods=["POST"])
+@token_required
+@role_required(["staff", "admin"])
+def add_order_items_bulk():
+    return bulk_insert("order_items", validate_order_item, "order items")
+
+@app.route("/order_items/<int:order_item_id>", methods=["GET"])
+@conditional_get("order_items")
+def get_order_item(order_item_id):
+    return get_row_response("order_items", order_item_id, "Order item not found")
+
 @app.route("/order_items/<int:order_item_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -632,8 +2622,15 @@ def update_order_item(order_item_id):
     monthly_payment_amount=%s, monthly_payment_date=%s WHERE order_item_id=%s
     """
     params = (order_id, service_id, order_quantity, monthly_payment_amount, monthly_payment_date, order_item_id)
+    rollup = REVENUE_ROLLUPS["order_items"]
     
-    result = execute_query(query, params)
+    # The old row leaves the rollup and the new one enters it in the same transaction
+    counts = execute_transaction([
+        (rollup.remove("order_item_id = %s"), (order_item_id,)),
+        (query, params),
+        (rollup.add("order_item_id = %s"), (order_item_id,))
+    ])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Order item updated successfully"}), 200
@@ -646,8 +2643,10 @@ def update_order_item(order_item_id):
 def delete_order_item(order_item_id):
     query = "DELETE FROM order_items WHERE order_item_id=%s"
     params = (order_item_id,)
+    rollup = REVENUE_ROLLUPS["order_items"]
     
-    result = execute_query(query, params)
+    counts = execute_transaction([(rollup.remove("order_item_id = %s"), params), (query, params)])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Order item deleted successfully"}), 200
@@ -657,29 +2656,15 @@ def delete_order_item(order_item_id):
 
 # CRUD operations for Customer_Payment_Details
 @app.route("/payments", methods=["GET"])
+@conditional_get("customer_payment_details")
 def get_all_payments():
-    query = "SELECT * FROM customer_payment_details"
-    payments = execute_query(query, fetch=True)
-    
-    if not payments:
-        return jsonify({"error": "No payments found"}), 404
-    
-    formatted_payments = [
-        {
-            "payment_id": payment["payment_id"],
-            "order_id": payment["order_id"],
-            "payment_date": payment["payment_date"].isoformat() if isinstance(payment["payment_date"], datetime.date) else str(payment["payment_date"]),
-            "payment_amount": float(payment["payment_amount"]) if isinstance(payment["payment_amount"], Decimal) else payment["payment_amount"],
-            "payment_method": payment["payment_method"],
-            "transaction_reference": payment["transaction_reference"]
-        }
-        for payment in payments
-    ]
-    return app.response_class(
-        response=json.dumps(formatted_payments, separators=(', ', ': ')),
-        status=200,
-        mimetype='application/json'
-    )
+    return list_table_response("payments", "No payments found")
+
+def validate_payment(data):
+    """Return an error message for an invalid payment payload, or None"""
+    if not data.get("order_id") or not data.get("payment_date") or data.get("payment_amount") is None or not data.get("payment_method"):
+        return "Required fields missing"
+    return None
 
 @app.route("/payments", methods=["POST"])
 @token_required
@@ -692,17 +2677,20 @@ def add_payment():
     payment_method = data.get("payment_method")
     transaction_reference = data.get("transaction_reference")
 
-    if not order_id or not payment_date or payment_amount is None or not payment_method:
-        return jsonify({"error": "Required fields missing"}), 400
+    error = validate_payment(data)
+    if error:
+        return jsonify({"error": error}), 400
 
     query = """
     INSERT INTO customer_payment_details (order_id, payment_date, payment_amount, payment_method, transaction_reference) 
     VALUES (%s, %s, %s, %s, %s)
     """
     params = (order_id, payment_date, payment_amount, payment_method, transaction_reference)
+    rollup = REVENUE_ROLLUPS["customer_payment_details"]
     
     try:
-        result = execute_query(query, params)
+        counts = execute_transaction([(query, params), (rollup.add("payment_id = LAST_INSERT_ID()"), None)])
+        result = counts[0] if counts else None
         
         if result is not None and result >= 0:
             return jsonify({"message": "Payment added successfully"}), 201
@@ -712,6 +2700,17 @@ def add_payment():
         logging.error(f"Error adding payment: {e}")
         return jsonify({"error": "An error occurred while adding payment"}), 500
 
+@app.route("/payments/bulk", methods=["POST"])
+@token_required
+@role_required(["staff", "admin"])
+def add_payments_bulk():
+    return bulk_insert("payments", validate_payment, "payments")
+
+@app.route("/payments/<int:payment_id>", methods=["GET"])
+@conditional_get("customer_payment_details")
+def get_payment(payment_id):
+    return get_row_response("payments", payment_id, "Payment not found")
+
 @app.route("/payments/<int:payment_id>", methods=["PUT"])
 @token_required
 @role_required(["staff", "admin"])
@@ -728,8 +2727,15 @@ def update_payment(payment_id):
     payment_method=%s, transaction_reference=%s WHERE payment_id=%s
     """
     params = (order_id, payment_date, payment_amount, payment_method, transaction_reference, payment_id)
+    rollup = REVENUE_ROLLUPS["customer_payment_details"]
     
-    result = execute_query(query, params)
+    # The old row leaves the rollup and the new one enters it in the same transaction
+    counts = execute_transaction([
+        (rollup.remove("payment_id = %s"), (payment_id,)),
+        (query, params),
+        (rollup.add("payment_id = %s"), (payment_id,))
+    ])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Payment updated successfully"}), 200
@@ -742,14 +2748,291 @@ def update_payment(payment_id):
 def delete_payment(payment_id):
     query = "DELETE FROM customer_payment_details WHERE payment_id=%s"
     params = (payment_id,)
+    rollup = REVENUE_ROLLUPS["customer_payment_details"]
     
-    result = execute_query(query, params)
+    counts = execute_transaction([(rollup.remove("payment_id = %s"), params), (query, params)])
+    result = counts[1] if counts else None
     
     if result:
         return jsonify({"message": "Payment deleted successfully"}), 200
     else:
         return jsonify({"error": "Failed to delete payment"}), 500
 
+# Cache statistics
+@app.route("/cache/stats", methods=["GET"])
+@token_required
+@role_required(["admin"])
+def get_cache_stats():
+    return jsonify({"services": services_cache.stats(), "tokens": token_cache.stats()}), 200
+
+# Revenue reports served from the rollups
+@app.route("/reports/revenue/<name>", methods=["GET"])
+@token_required
+@role_required(["staff", "admin"])
+@conditional_get("customer_payment_details", "order_items")
+def get_revenue_report(name):
+    rollup = REVENUE_REPORTS.get(name)
+    if rollup is None:
+        return jsonify({"error": f"Unknown report, expected one of: {', '.join(REVENUE_REPORTS)}"}), 404
+
+    group = [column for column in request.args.get("group", f"day,{rollup.dimension}").split(",") if column]
+    if any(column not in ("day", rollup.dimension) for column in group):
+        return jsonify({"error": f"group must be a subset of day,{rollup.dimension}"}), 400
+
+    conditions = []
+    params = []
+    try:
+        for arg, condition, parse in (("from", "day >= %s", parse_date_arg), ("to", "day <= %s", parse_date_arg),
+                                      (rollup.dimension, f"{rollup.dimension} = %s", str)):
+            value = request.args.get(arg)
+            if value is not None:
+                conditions.append(condition)
+                params.append(parse(value))
+    except ValueError:
+        return jsonify({"error": "from and to must be dates (YYYY-MM-DD)"}), 400
+
+    selected = group + ["SUM(amount) AS amount", "SUM(row_count) AS count"]
+    query = f"SELECT {', '.join(selected)} FROM {rollup.table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    if group:
+        query += f" GROUP BY {', '.join(group)}"
+    # Buckets whose rows were all deleted stay behind with a zero count
+    query += " HAVING SUM(row_count) > 0"
+    if group:
+        query += f" ORDER BY {', '.join(group)}"
+
+    rows = execute_query(query, tuple(params), fetch=True)
+    if rows is None:
+        return jsonify({"error": "Failed to fetch revenue report"}), 500
+    for row in rows:
+        if "day" in row:
+            row["day"] = str(row["day"])
+        row["amount"] = float(row["amount"])
+        row["count"] = int(row["count"])
+    return app.response_class(response=json_dumps(rows), status=200, mimetype='application/json')
+
+# Prometheus metrics
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return app.response_class(
+        response="\n".join(lines) + "\n",
+        status=200,
+        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+    )
+
+# Request profiles
+@app.route("/profiles", methods=["GET"])
+@token_required
+@role_required(["admin"])
+def list_profiles():
+    with profiles_lock:
+        summaries = [{key: value for key, value in profile.items() if key != "profile"} for profile in profiles.values()]
+    return jsonify(list(reversed(summaries))), 200
+
+@app.route("/profiles/<profile_id>", methods=["GET"])
+@token_required
+@role_required(["admin"])
+def get_profile(profile_id):
+    with profiles_lock:
+        profile = profiles.get(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return app.response_class(response=profile["profile"], status=200, mimetype="text/plain")
+
+# Slow query log
+@app.route("/stats/slow-queries", methods=["GET"])
+@token_required
+@role_required(["admin"])
+def get_slow_queries():
+    return jsonify({
+        "threshold_ms": slow_query_log.threshold * 1000,
+        "queries": slow_query_log.entries()
+    }), 200
+
+@app.route("/stats/slow-queries", methods=["DELETE"])
+@token_required
+@role_required(["admin"])
+def clear_slow_queries():
+    slow_query_log.clear()
+    return jsonify({"message": "Slow query log cleared"}), 200
+
+# Latency statistics
+@app.route("/stats/latency", methods=["GET"])
+@token_required
+@role_required(["admin"])
+def get_latency_stats():
+    return jsonify({
+        "requests": {group: stats.snapshot() for group, stats in request_latency.items()},
+        "password_hashing": password_hasher.stats()
+    }), 200
+
+# Streaming exports for every table
+@app.route("/exports/<name>", methods=["GET"])
+def export_table(name):
+    if name not in TABLE_SCHEMAS:
+        return jsonify({"error": f"Exports are available for: {', '.join(TABLE_SCHEMAS)}"}), 404
+    schema = TABLE_SCHEMAS[name]
+    key_column, date_column = schema.key_column, schema.date_column
+
+    data_format = request.args.get("format", "csv")
+    if data_format not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+    try:
+        serializer = schema.serializer_for(schema.project(request.args.get("fields")), null_dates=True)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    columns = serializer.names
+
+    conditions = []
+    params = []
+    after = request.args.get("after")
+    if after is not None:
+        try:
+            params.append(int(after))
+        except ValueError:
+            return jsonify({"error": "after must be an integer key"}), 400
+        conditions.append(f"{key_column} > %s")
+
+    for arg, operator in (("from", ">="), ("to", "<=")):
+        value = request.args.get(arg)
+        if value is None:
+            continue
+        if not date_column:
+            return jsonify({"error": f"{name} has no date column to filter on"}), 400
+        try:
+            params.append(datetime.date.fromisoformat(value).isoformat())
+        except ValueError:
+            return jsonify({"error": f"{arg} must be a YYYY-MM-DD date"}), 400
+        conditions.append(f"{date_column} {operator} %s")
+
+    # Rows come out in key order so an interrupted export resumes with ?after=<last key>
+    query = f"SELECT {', '.join(columns)} FROM {schema.table}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += f" ORDER BY {key_column}"
+
+    stream, error = open_streaming_query(query, tuple(params))
+    if error:
+        return error
+
+    if data_format == "ndjson":
+        def generate():
+            for rows in stream.chunks():
+                yield serializer.dumps_lines(rows)
+        mimetype = "application/x-ndjson"
+    else:
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            for rows in stream.chunks():
+                writer.writerows(serializer.values(rows))
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+            yield buffer.getvalue()
+        mimetype = "text/csv"
+
+    response = streaming_response(stream, generate(), mimetype)
+    response.headers["Content-Disposition"] = f"attachment; filename={name}.{data_format}"
+    return response
+
+# Streaming imports for Order_Items and Customer_Payment_Details
+IMPORT_CONTENT_TYPES = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson"
+}
+
+@app.route("/imports/<target>", methods=["POST"])
+@token_required
+@role_required(["staff", "admin"])
+def import_rows(target):
+    if target not in IMPORT_SCHEMAS:
+        return jsonify({"error": f"Imports are supported for: {', '.join(IMPORT_SCHEMAS)}"}), 404
+
+    data_format = request.args.get("format") or IMPORT_CONTENT_TYPES.get(request.mimetype)
+    if data_format not in ("csv", "ndjson"):
+        return jsonify({"error": "Content-Type must be text/csv or application/x-ndjson"}), 415
+
+    job = run_import(target, request.stream, data_format)
+    status = 201 if job.status == "completed" else 400
+    return jsonify(job.to_dict()), status
+
+@app.route("/imports", methods=["GET"])
+@token_required
+@role_required(["staff", "admin"])
+def list_imports():
+    with import_jobs_lock:
+        jobs = [job.to_dict() for job in reversed(import_jobs.values())]
+    return jsonify(jobs), 200
+
+@app.route("/imports/<job_id>", methods=["GET"])
+@token_required
+@role_required(["staff", "admin"])
+def get_import(job_id):
+    job = import_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Import not found"}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route("/imports/<job_id>/rejected", methods=["GET"])
+@token_required
+@role_required(["staff", "admin"])
+def get_import_rejected(job_id):
+    job = import_jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Import not found"}), 404
+    return jsonify(job.rejected_rows), 200
+
+@app.cli.command("import-data")
+@click.argument("target", type=click.Choice(list(IMPORT_SCHEMAS)))
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "data_format", type=click.Choice(["csv", "ndjson"]), help="Defaults to the file extension.")
+@click.option("--chunk-size", default=IMPORT_CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+def import_data_command(target, path, data_format, chunk_size):
+    """Load a CSV or NDJSON file into order_items or payments."""
+    data_format = data_format or ("csv" if path.lower().endswith(".csv") else "ndjson")
+    with open(path, "rb") as stream:
+        job = run_import(target, stream, data_format, chunk_size=chunk_size)
+
+    click.echo(f"{job.status}: {job.rows_read} rows read, {job.inserted} inserted, {job.rejected} rejected")
+    for rejected in job.rejected_rows:
+        click.echo(f"  line {rejected['line']}: {rejected['error']}")
+
+@app.cli.command("import-users")
+@click.argument("path", default=USER_DATA_FILE, type=click.Path(exists=True, dir_okay=False))
+def import_users_command(path):
+    """Copy users from a legacy users.json file into the users table."""
+    with open(path, "r") as file:
+        legacy_users = json.load(file)
+
+    rows = [(username, user["password"], user.get("role", "admin")) for username, user in legacy_users.items()]
+    if not rows:
+        click.echo("No users to import")
+        return
+    # Users already in the table keep their current password and role
+    query = ("INSERT INTO users (username, password_hash, role) VALUES (%s, %s, %s) "
+             "ON DUPLICATE KEY UPDATE username = username")
+    if execute_many(query, rows) is None:
+        raise click.ClickException("Failed to import users")
+    click.echo(f"{len(rows)} users read from {path}")
+
+@app.cli.command("rebuild-revenue-rollups")
+def rebuild_revenue_rollups_command():
+    """Recompute the revenue rollups from payments and order items."""
+    for rollup in REVENUE_ROLLUPS.values():
+        counts = execute_transaction([(f"DELETE FROM {rollup.table}", None), (rollup.add("TRUE"), None)])
+        if counts is None:
+            raise click.ClickException(f"Failed to rebuild {rollup.table}")
+        # Report ETags are keyed on the source table's version
+        bump_table_version(rollup.source)
+        click.echo(f"{rollup.table}: rebuilt from {rollup.source}")
+
 @app.route("/")
 def hello_world():
     return """
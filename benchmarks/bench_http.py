@@ -0,0 +1,473 @@
+"""Drive every route over HTTP and report throughput, latency percentiles and server RSS.
+
+The app runs in a child process on a threaded werkzeug server backed by the
+stand-in database in benchmarks/standin_db.py, so no MySQL server is needed and
+the memory figures belong to the server alone, sampled while each scenario runs.
+Results are written as JSON; `compare` flags scenarios that got slower or
+bigger between two runs.
+
+Run from the project root:
+    python benchmarks/bench_http.py run --customers 10000 --concurrency 8 --output before.json
+    python benchmarks/bench_http.py run --customers 10000 --concurrency 8 --output after.json
+    python benchmarks/bench_http.py compare before.json after.json
+"""
+import argparse
+import datetime
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as app_module
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "bench-password"
+
+# Tables with a /<table>/bulk route
+BULK_TABLES = ("customers", "orders", "order_items", "payments")
+
+# Scenarios that hash a password, and run --auth-requests times instead of --requests
+AUTH_SCENARIOS = ("login", "register")
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class RssSampler:
+    """Peak resident set size of another process, sampled from a background thread"""
+
+    def __init__(self, pid, interval=0.02):
+        self.pid = pid
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def read_kb(self):
+        try:
+            with open(f"/proc/{self.pid}/status") as status:
+                for line in status:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1])
+        except FileNotFoundError:
+            # No procfs (macOS): ps reports RSS in KiB too
+            output = subprocess.run(["ps", "-o", "rss=", "-p", str(self.pid)], capture_output=True, text=True).stdout
+            return int(output.strip() or 0)
+        return 0
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_kb = max(self.peak_kb, self.read_kb())
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self.peak_kb = self.read_kb()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Peak RSS in MB since start()"""
+        self._stop.set()
+        self._thread.join()
+        self.peak_kb = max(self.peak_kb, self.read_kb())
+        return round(self.peak_kb / 1024, 1)
+
+
+def sample_body(schema, rng):
+    """A valid JSON body for POST/PUT on the table"""
+    body = {}
+    for name, kind, _ in schema.insert_columns:
+        if name.endswith("_id"):
+            body[name] = rng.randint(1, 10)
+        elif kind == "int":
+            body[name] = rng.randint(1, 5)
+        elif kind == "decimal":
+            body[name] = round(rng.uniform(1, 500), 2)
+        elif kind == "date":
+            body[name] = (datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randint(0, 364))).isoformat()
+        elif kind == "enum":
+            body[name] = "Pending"
+        else:
+            body[name] = f"bench-{rng.randint(0, 99999)}"
+    return body
+
+
+def import_body(target, rng, rows):
+    """A CSV upload of rows valid rows for /imports/<target>"""
+    columns = [name for name, _, _ in app_module.IMPORT_SCHEMAS[target].insert_columns]
+    lines = [",".join(columns)]
+    for _ in range(rows):
+        body = sample_body(app_module.IMPORT_SCHEMAS[target], rng)
+        lines.append(",".join(str(body[column]) for column in columns))
+    return ("\n".join(lines) + "\n").encode()
+
+
+def fresh_token(role="admin"):
+    """A token no other request has used, for routes that revoke the token they are given"""
+    with app_module.app.app_context():
+        return app_module.generate_token(f"{BENCH_USER}-{os.urandom(4).hex()}", role)
+
+
+def build_scenarios(sizes, token, fixtures, bulk_rows):
+    """Scenario name -> factory of (method, path, body, headers) for every route"""
+    admin = {"Authorization": f"Bearer {token}"}
+
+    def request(method, path_for, body_for=None, auth=True, content_type="application/json"):
+        def build(rng):
+            headers = dict(admin) if auth else {}
+            body = None
+            if body_for:
+                body = body_for(rng)
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                headers["Content-Type"] = content_type
+            return method, path_for(rng), body, headers
+        return build
+
+    scenarios = {}
+    for name, schema in app_module.TABLE_SCHEMAS.items():
+        size = sizes[schema.table]
+        one = lambda rng, name=name, size=size: f"/{name}/{rng.randint(1, size)}"
+        new_row = lambda rng, schema=schema: sample_body(schema, rng)
+        scenarios.update({
+            f"list_{name}": request("GET", lambda rng, name=name: f"/{name}", auth=False),
+            f"page_{name}": request("GET", lambda rng, name=name: f"/{name}?limit=100", auth=False),
+            f"stream_{name}": request("GET", lambda rng, name=name: f"/{name}?stream=1", auth=False),
+            f"get_{name}": request("GET", one, auth=False),
+            f"create_{name}": request("POST", lambda rng, name=name: f"/{name}", new_row),
+            f"update_{name}": request("PUT", one, new_row),
+            f"delete_{name}": request("DELETE", one),
+            f"export_{name}": request("GET", lambda rng, name=name: f"/exports/{name}?format=ndjson", auth=False),
+        })
+        if name in BULK_TABLES:
+            scenarios[f"bulk_{name}"] = request(
+                "POST", lambda rng, name=name: f"/{name}/bulk",
+                lambda rng, schema=schema: [sample_body(schema, rng) for _ in range(bulk_rows)]
+            )
+
+    for target in app_module.IMPORT_SCHEMAS:
+        scenarios[f"import_{target}"] = request(
+            "POST", lambda rng, target=target: f"/imports/{target}",
+            lambda rng, target=target: import_body(target, rng, bulk_rows), content_type="text/csv"
+        )
+
+    customers = sizes["customers"]
+    scenarios.update({
+        "filter_orders": request("GET", lambda rng: "/orders?status=Pending&limit=100", auth=False),
+        "multi_get_customers": request(
+            "GET", lambda rng: "/customers?ids=" + ",".join(str(rng.randint(1, customers)) for _ in range(20)), auth=False
+        ),
+        "customer_overview": request("GET", lambda rng: f"/customers/{rng.randint(1, customers)}/overview", auth=False),
+        "customer_search": request("GET", lambda rng: "/customers/search?q=name", auth=False),
+        "export_payments_csv": request("GET", lambda rng: "/exports/payments", auth=False),
+        "revenue_payment_methods": request("GET", lambda rng: "/reports/revenue/payment_methods"),
+        "revenue_services": request("GET", lambda rng: "/reports/revenue/services"),
+        "list_imports": request("GET", lambda rng: "/imports"),
+        "get_import": request("GET", lambda rng: f"/imports/{fixtures['import_id']}"),
+        "get_import_rejected": request("GET", lambda rng: f"/imports/{fixtures['import_id']}/rejected"),
+        "cache_stats": request("GET", lambda rng: "/cache/stats"),
+        "latency_stats": request("GET", lambda rng: "/stats/latency"),
+        "slow_queries": request("GET", lambda rng: "/stats/slow-queries"),
+        "clear_slow_queries": request("DELETE", lambda rng: "/stats/slow-queries"),
+        "metrics": request("GET", lambda rng: "/metrics", auth=False),
+        "list_profiles": request("GET", lambda rng: "/profiles"),
+        "get_profile": request("GET", lambda rng: f"/profiles/{fixtures['profile_id']}"),
+        "index": request("GET", lambda rng: "/", auth=False),
+        "login": request("POST", lambda rng: "/login",
+                         lambda rng: {"username": BENCH_USER, "password": BENCH_PASSWORD}, auth=False),
+        "register": request("POST", lambda rng: "/register",
+                            lambda rng: {"username": f"{BENCH_USER}-{rng.getrandbits(64):x}",
+                                         "password": BENCH_PASSWORD, "role": "staff"}, auth=False),
+        "revoke_token": request("POST", lambda rng: "/tokens/revoke", lambda rng: {"token": fresh_token("staff")}),
+    })
+
+    # Logging out revokes the token it is sent with, so every request brings its own
+    def logout(rng):
+        return "POST", "/logout", None, {"Authorization": f"Bearer {fresh_token()}"}
+    scenarios["logout"] = logout
+    return scenarios
+
+
+def uncovered_routes(scenarios):
+    """Routes of the app that no scenario requests, as 'METHOD rule'"""
+    adapter = app_module.app.url_map.bind("localhost")
+    covered = set()
+    for build in scenarios.values():
+        method, path, _, _ = build(random.Random(0))
+        endpoint, _ = adapter.match(path.split("?")[0], method=method)
+        covered.add((endpoint, method))
+    return sorted(
+        f"{method} {rule.rule}"
+        for rule in app_module.app.url_map.iter_rules() if rule.endpoint != "static"
+        for method in rule.methods - {"HEAD", "OPTIONS"} if (rule.endpoint, method) not in covered
+    )
+
+
+def send(port, method, path, body=None, headers=None):
+    """One request on a fresh connection, for setting up fixtures"""
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        connection.request(method, path, body=body, headers=headers or {})
+        response = connection.getresponse()
+        return response, response.read()
+    finally:
+        connection.close()
+
+
+def run_scenario(port, pid, name, build, requests, concurrency, warmup, seed):
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def send_one(rng, record):
+        connection = getattr(local, "connection", None)
+        if connection is None:
+            connection = local.connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+        method, path, body, headers = build(rng)
+        headers["Accept-Encoding"] = "gzip"
+
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException) as e:
+            local.connection = None
+            status = repr(e)
+        elapsed = time.perf_counter() - started
+        if record:
+            with lock:
+                latencies.append(elapsed)
+                if not isinstance(status, int) or status >= 400:
+                    errors.append(status)
+
+    def worker(index, count, record):
+        rng = random.Random(f"{seed}:{name}:{index}:{record}")
+        for _ in range(count):
+            send_one(rng, record)
+
+    def spread(total, record):
+        shares = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(lambda args: worker(*args), [(i, share, record) for i, share in enumerate(shares)]))
+
+    spread(warmup, False)
+    sampler = RssSampler(pid)
+    sampler.start()
+    started = time.perf_counter()
+    spread(requests, True)
+    elapsed = time.perf_counter() - started
+    peak_rss = sampler.stop()
+
+    latencies.sort()
+    to_ms = lambda seconds: round(seconds * 1000, 3) if seconds is not None else None
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "error_samples": sorted({str(error) for error in errors})[:5],
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": to_ms(percentile(latencies, 0.50)),
+        "p95_ms": to_ms(percentile(latencies, 0.95)),
+        "p99_ms": to_ms(percentile(latencies, 0.99)),
+        "peak_rss_mb": peak_rss,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def serve(args):
+    """Child process: serve the app on the stand-in database and report the port on stdout"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    from standin_db import StandInDatabase, install
+
+    class KeepAliveHandler(WSGIRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_request(self, *args, **kwargs):
+            pass
+
+    logging.getLogger().setLevel(logging.ERROR)
+    password_hash = app_module.generate_password_hash(BENCH_PASSWORD, app_module.password_hasher.method)
+    database = StandInDatabase(app_module.TABLE_SCHEMAS, customers=args.customers, seed=args.seed,
+                               users={BENCH_USER: (password_hash, "admin")})
+    install(database)
+    # One pooled connection per client thread, so the pool itself is not the bottleneck being measured
+    app_module.db_pool.dispose()
+    pool_config = dict(app_module.DB_POOL_CONFIG, pool_size=max(app_module.DB_POOL_CONFIG["pool_size"], args.concurrency))
+    app_module.db_pool = app_module.ConnectionPool(app_module.DB_CONFIG, **pool_config)
+
+    server = make_server("127.0.0.1", 0, app_module.app, threaded=True, request_handler=KeepAliveHandler)
+    print(json.dumps({"port": server.port, "sizes": database.sizes}), flush=True)
+    server.serve_forever()
+
+
+def start_server(args):
+    """Start the serve child; returns (process, port, table sizes)"""
+    command = [sys.executable, os.path.abspath(__file__), "serve", "--customers", str(args.customers),
+               "--seed", str(args.seed), "--concurrency", str(args.concurrency)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    handshake = process.stdout.readline()
+    if not handshake:
+        process.wait()
+        sys.exit(f"Benchmark server exited with status {process.returncode}")
+    ready = json.loads(handshake)
+    return process, ready["port"], ready["sizes"]
+
+
+def run(args):
+    logging.getLogger().setLevel(logging.ERROR)
+    process, port, sizes = start_server(args)
+    try:
+        with app_module.app.app_context():
+            token = app_module.generate_token(BENCH_USER, "admin")
+        admin = {"Authorization": f"Bearer {token}"}
+
+        # Ids the import and profile lookups need
+        _, body = send(port, "POST", "/imports/payments", import_body("payments", random.Random(args.seed), 10),
+                       {**admin, "Content-Type": "text/csv"})
+        response, _ = send(port, "GET", "/?profile=1", headers=admin)
+        fixtures = {"import_id": json.loads(body)["id"], "profile_id": response.getheader("X-Profile-Id")}
+
+        scenarios = build_scenarios(sizes, token, fixtures, args.bulk_rows)
+        missing = uncovered_routes(scenarios)
+        if missing:
+            print(f"warning: routes without a scenario: {', '.join(missing)}")
+
+        pattern = re.compile(args.only) if args.only else None
+        results = {}
+        started_rss = round(RssSampler(process.pid).read_kb() / 1024, 1)
+        print(f"{'scenario':<28} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'rss MB':>8}")
+        for name, build in scenarios.items():
+            if pattern and not pattern.search(name):
+                continue
+            requests = args.auth_requests if name in AUTH_SCENARIOS else args.requests
+            result = run_scenario(port, process.pid, name, build, requests, args.concurrency, args.warmup, args.seed)
+            results[name] = result
+            print(f"{name:<28} {result['throughput_rps']:>9} {result['p50_ms']:>9} {result['p95_ms']:>9} "
+                  f"{result['p99_ms']:>9} {result['errors']:>7} {result['peak_rss_mb']:>8}")
+    finally:
+        process.terminate()
+        process.wait()
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "at": datetime.datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "json_backend": app_module.JSON_BACKEND,
+            "customers": args.customers,
+            "table_sizes": sizes,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "auth_requests": args.auth_requests,
+            "bulk_rows": args.bulk_rows,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "server_rss_start_mb": started_rss,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print(f"Results written to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.candidate) as file:
+        candidate = json.load(file)
+    rss_tolerance = args.tolerance if args.rss_tolerance is None else args.rss_tolerance
+
+    def change(old, new):
+        return new / old - 1 if old else 0.0
+
+    regressions = []
+    print(f"{'scenario':<28} {'rps':>19} {'p95 ms':>21} {'rss MB':>17}")
+    for name, new in candidate["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            print(f"{name:<28} (new)")
+            continue
+        flag = ""
+        if (change(old["throughput_rps"], new["throughput_rps"]) < -args.tolerance
+                or change(old["p95_ms"], new["p95_ms"]) > args.tolerance
+                or change(old["peak_rss_mb"], new["peak_rss_mb"]) > rss_tolerance
+                or new["errors"] > old["errors"]):
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<28} {old['throughput_rps']:>8} -> {new['throughput_rps']:<8} "
+              f"{old['p95_ms']:>8} -> {new['p95_ms']:<10} {old['peak_rss_mb']:>6} -> {new['peak_rss_mb']:<6}{flag}")
+
+    for key in ("customers", "concurrency", "requests", "bulk_rows", "json_backend"):
+        if baseline["meta"].get(key) != candidate["meta"].get(key):
+            print(f"warning: runs differ in {key}: {baseline['meta'].get(key)} vs {candidate['meta'].get(key)}")
+    if regressions:
+        print(f"{len(regressions)} scenario(s) regressed beyond the tolerance")
+        sys.exit(1)
+    print("No regressions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Benchmark every route")
+    run_parser.add_argument("--customers", type=int, default=1000, help="Dataset size; other tables scale with it")
+    run_parser.add_argument("--concurrency", type=int, default=8)
+    run_parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    run_parser.add_argument("--auth-requests", type=int, default=50,
+                            help="Measured requests for login and register, which hash a password")
+    run_parser.add_argument("--bulk-rows", type=int, default=100, help="Rows per bulk insert or import request")
+    run_parser.add_argument("--warmup", type=int, default=20)
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--only", help="Regular expression selecting scenarios by name")
+    run_parser.add_argument("--output", help="Write results as JSON to this file")
+    run_parser.set_defaults(handler=run)
+
+    serve_parser = commands.add_parser("serve", help="Serve the app on the stand-in database (used by run)")
+    serve_parser.add_argument("--customers", type=int, default=1000)
+    serve_parser.add_argument("--concurrency", type=int, default=8)
+    serve_parser.add_argument("--seed", type=int, default=42)
+    serve_parser.set_defaults(handler=serve)
+
+    compare_parser = commands.add_parser("compare", help="Flag regressions between two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("candidate")
+    compare_parser.add_argument("--tolerance", type=float, default=0.10,
+                                help="Allowed relative drop in throughput or rise in p95 (default 0.10)")
+    compare_parser.add_argument("--rss-tolerance", type=float,
+                                help="Allowed relative rise in peak server RSS (default: --tolerance)")
+    compare_parser.set_defaults(handler=compare)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare the per-row dict rebuild the list routes used to do with the
+schema-driven RowSerializer.
+
+Run from the project root:
+    python benchmarks/bench_serialization.py --rows 100000
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+
+
+def make_rows(count):
+    """Payment rows as a tuple cursor returns them"""
+    names = app_module.TABLE_SCHEMAS["payments"].column_names
+    start = datetime.date(2024, 1, 1)
+    tuples = [
+        (i, i % 5000 + 1, start + datetime.timedelta(days=i % 365), Decimal(f"{i % 500}.{i % 100:02d}"),
+         ("Credit Card", "PayPal", "Cash", "Bank Transfer")[i % 4], f"ref-{i:08d}")
+        for i in range(1, count + 1)
+    ]
+    return tuples
+
+
+def legacy_dumps(rows, names):
+    """The formatting loop get_all_payments ran before the shared serializer,
+    including the per-row dict a dictionary cursor builds"""
+    payments = [dict(zip(names, row)) for row in rows]
+    formatted_payments = [
+        {
+            "payment_id": payment["payment_id"],
+            "order_id": payment["order_id"],
+            "payment_date": payment["payment_date"].isoformat() if isinstance(payment["payment_date"], datetime.date) else str(payment["payment_date"]),
+            "payment_amount": float(payment["payment_amount"]) if isinstance(payment["payment_amount"], Decimal) else payment["payment_amount"],
+            "payment_method": payment["payment_method"],
+            "transaction_reference": payment["transaction_reference"]
+        }
+        for payment in payments
+    ]
+    return json.dumps(formatted_payments, separators=(', ', ': '))
+
+
+def best_of(repeat, fn, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    schema = app_module.TABLE_SCHEMAS["payments"]
+    serializer = schema.serializer
+    assert json.loads(serializer.dumps(rows)) == json.loads(legacy_dumps(rows, schema.column_names))
+
+    print(f"{args.rows} payment rows, best of {args.repeat}")
+    legacy = best_of(args.repeat, legacy_dumps, rows, schema.column_names)
+    print(f"{'legacy dict rebuild + json':<32} {legacy * 1000:9.1f} ms")
+    for backend in app_module.JSON_BACKENDS:
+        app_module.JSON_BACKEND = backend
+        elapsed = best_of(args.repeat, serializer.dumps, rows)
+        print(f"{'RowSerializer + ' + backend:<32} {elapsed * 1000:9.1f} ms  ({legacy / elapsed:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""Fill every table with realistic synthetic data for performance work.
+
+Rows are generated with Faker and appended after the current maximum key of
+each table through the app's own database helpers, so the script reads the
+same DB_CONFIG as the API. Load order follows the foreign keys; every table is
+split into chunks that a process pool generates and inserts in their own
+transactions. Each chunk is seeded from --seed, so the same seed and sizes
+give the same rows whatever the number of workers.
+
+Run from the project root:
+    python benchmarks/generate_data.py --payments 10000000 --workers 8 --seed 42
+"""
+import datetime
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+
+import click
+from faker import Faker
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import app as app_module
+
+# Faker logs every provider lookup at DEBUG
+logging.getLogger("faker").setLevel(logging.INFO)
+
+SYNTHETIC_CHUNK_SIZE = 10000
+SYNTHETIC_PAYMENT_METHODS = (("Credit Card", 45), ("PayPal", 20), ("Bank Transfer", 25), ("Cash", 10))
+SYNTHETIC_QUANTITIES = ((1, 70), (2, 18), (3, 7), (5, 3), (10, 2))
+
+# Load order; tables in the same stage do not reference each other
+SYNTHETIC_STAGES = (("addresses", "services"), ("customers",), ("orders",), ("order_items", "payments"))
+
+
+class SyntheticPlan:
+    """Row counts, first ids and date range of one run"""
+
+    def __init__(self, payments, services=100, years=3, seed=42, first_ids=None, today=None):
+        self.seed = seed
+        orders = max(1, payments // 2)
+        customers = max(1, orders // 4)
+        self.counts = {
+            "addresses": customers,
+            "services": services,
+            "customers": customers,
+            "orders": orders,
+            "order_items": orders * 3 // 2,
+            "payments": payments
+        }
+        first_ids = first_ids or {}
+        self.first_ids = {table: first_ids.get(table, 1) for table in self.counts}
+        self.today = today or datetime.date.today()
+        self.span_days = years * 365
+        self.first_day = self.today - datetime.timedelta(days=self.span_days)
+        self.service_prices = {}
+
+    def ids(self, table):
+        return range(self.first_ids[table], self.first_ids[table] + self.counts[table])
+
+    def chunks(self, table, chunk_size):
+        """(table, chunk index, first id, row count) covering every new row of the table"""
+        first, count = self.first_ids[table], self.counts[table]
+        return [
+            (table, index, first + start, min(chunk_size, count - start))
+            for index, start in enumerate(range(0, count, chunk_size))
+        ]
+
+    def order_date(self, order_id):
+        # Ids grow with time as they do under AUTO_INCREMENT, so any chunk can date an order from its id alone
+        position = (order_id - self.first_ids["orders"]) / self.counts["orders"]
+        return self.first_day + datetime.timedelta(days=int(position * self.span_days))
+
+
+def skewed_id(rng, ids, skew):
+    """An id from the range where low ids are picked far more often (a few heavy customers, popular services)"""
+    return ids[min(len(ids) - 1, int(len(ids) * rng.random() ** skew))]
+
+
+def weighted_choice(rng, choices):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights)[0]
+
+
+def synthetic_rows(plan, table, chunk_index, first_id, count):
+    """Rows of one chunk as tuples in TABLE_SCHEMAS column order, deterministic for the plan's seed"""
+    rng = random.Random(f"{plan.seed}:{table}:{chunk_index}")
+    # Frequency weighting makes Faker several times slower and dominates load time at scale
+    fake = Faker("en_US", use_weighting=False)
+    fake.seed_instance(rng.getrandbits(64))
+    rows = []
+    for row_id in range(first_id, first_id + count):
+        if table == "addresses":
+            rows.append((row_id, fake.building_number(), fake.street_name(), fake.city(), fake.postcode(),
+                         fake.state(), fake.country()[:100]))
+        elif table == "services":
+            rows.append((row_id, fake.bs().capitalize(), Decimal(rng.randint(500, 25000)) / 100))
+        elif table == "customers":
+            email = fake.email() if rng.random() < 0.9 else None
+            rows.append((row_id, rng.choice(plan.ids("addresses")), fake.name(), fake.phone_number()[:20], email))
+        elif table == "orders":
+            order_date = plan.order_date(row_id)
+            age = (plan.today - order_date).days
+            if age > 60:
+                status = weighted_choice(rng, (("Completed", 85), ("Cancelled", 12), ("Shipped", 3)))
+            else:
+                status = weighted_choice(rng, (("Pending", 30), ("In Progress", 35), ("Shipped", 25), ("Cancelled", 10)))
+            start_date = order_date + datetime.timedelta(days=rng.randint(0, 14))
+            end_date = None
+            if status in ("Completed", "Cancelled"):
+                end_date = start_date + datetime.timedelta(days=rng.randint(30, 365))
+            rows.append((row_id, skewed_id(rng, plan.ids("customers"), 3), status, order_date, start_date, end_date))
+        elif table == "order_items":
+            order_id = rng.choice(plan.ids("orders"))
+            service_id = skewed_id(rng, plan.ids("services"), 2)
+            quantity = weighted_choice(rng, SYNTHETIC_QUANTITIES)
+            # A unit price per period: the revenue rollup multiplies it by the quantity
+            amount = plan.service_prices.get(service_id, Decimal("0.00"))
+            rows.append((row_id, order_id, service_id, quantity, amount,
+                         plan.order_date(order_id) + datetime.timedelta(days=rng.randint(0, 30))))
+        elif table == "payments":
+            order_id = rng.choice(plan.ids("orders"))
+            payment_date = min(plan.today, plan.order_date(order_id) + datetime.timedelta(days=rng.randint(0, 45)))
+            # Log-normal amounts: most payments are small, a long tail is not
+            amount = Decimal(round(min(rng.lognormvariate(4.5, 0.9), 99999.99), 2)).quantize(Decimal("0.01"))
+            rows.append((row_id, order_id, payment_date, amount, weighted_choice(rng, SYNTHETIC_PAYMENT_METHODS),
+                         str(uuid.UUID(int=rng.getrandbits(128), version=4))))
+    return rows
+
+
+def load_synthetic_chunk(plan, table, chunk_index, first_id, count):
+    """Generate and insert one chunk in its own transaction; returns the rows written or None"""
+    schema = app_module.TABLE_SCHEMAS[table]
+    columns = schema.column_names
+    query = f"INSERT INTO {schema.table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    # Rollups are rebuilt once after the load rather than updated by every chunk
+    return app_module.execute_many(query, synthetic_rows(plan, table, chunk_index, first_id, count))
+
+
+def last_ids():
+    """Highest existing key of every table, so generated rows follow the current data"""
+    ids = {}
+    for name, schema in app_module.TABLE_SCHEMAS.items():
+        query = f"SELECT COALESCE(MAX({schema.key_column}), 0) AS last_id FROM {schema.table}"
+        rows = app_module.execute_query(query, fetch=True)
+        if rows is None:
+            return None
+        ids[name] = rows[0]["last_id"] if rows else 0
+    return ids
+
+
+@click.command()
+@click.option("--payments", default=100000, show_default=True,
+              help="Payments to generate; the other tables are sized from it.")
+@click.option("--services", default=100, show_default=True, help="Services to add to the catalog.")
+@click.option("--years", default=3, show_default=True, help="Years of order history ending today.")
+@click.option("--seed", default=42, show_default=True, help="Same seed and sizes give the same rows.")
+@click.option("--workers", default=os.cpu_count() or 1, show_default="CPU count", help="Parallel loader processes.")
+@click.option("--chunk-size", default=SYNTHETIC_CHUNK_SIZE, show_default=True, help="Rows per transaction.")
+@click.pass_context
+def main(ctx, payments, services, years, seed, workers, chunk_size):
+    """Fill every table with realistic synthetic data for performance work."""
+    with app_module.app.app_context():
+        load(payments, services, years, seed, workers, chunk_size)
+        ctx.invoke(app_module.rebuild_revenue_rollups_command)
+        for table in sorted({table for tables in app_module.WRITE_TABLES.values() for table in tables}):
+            app_module.bump_table_version(table)
+        app_module.services_cache.clear()
+
+
+def load(payments, services, years, seed, workers, chunk_size):
+    """Append the generated rows of every table, stage by stage"""
+    existing = last_ids()
+    if existing is None:
+        raise click.ClickException("Failed to read the current table keys")
+    plan = SyntheticPlan(payments, services=services, years=years, seed=seed,
+                         first_ids={table: last_id + 1 for table, last_id in existing.items()})
+
+    pool = ProcessPoolExecutor(workers) if workers > 1 else None
+    try:
+        for stage in SYNTHETIC_STAGES:
+            if "order_items" in stage:
+                # Item amounts are priced from the whole catalog, old services included
+                prices = app_module.execute_query("SELECT service_id, price_per_period FROM services", fetch=True)
+                if prices is None:
+                    raise click.ClickException("Failed to read service prices")
+                plan.service_prices = {row["service_id"]: row["price_per_period"] for row in prices}
+
+            started = time.perf_counter()
+            chunks = [chunk for table in stage for chunk in plan.chunks(table, chunk_size)]
+            if pool:
+                futures = [pool.submit(load_synthetic_chunk, plan, *chunk) for chunk in chunks]
+                results = [future.result() for future in futures]
+            else:
+                results = [load_synthetic_chunk(plan, *chunk) for chunk in chunks]
+
+            for table in stage:
+                written = [result for chunk, result in zip(chunks, results) if chunk[0] == table]
+                if None in written:
+                    raise click.ClickException(f"Failed to load {table}; rows already committed are kept")
+                click.echo(f"{table}: {sum(written)} rows from id {plan.first_ids[table]} "
+                           f"in {time.perf_counter() - started:.1f}s")
+    finally:
+        if pool:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""In-process stand-in for mysql.connector used by the HTTP benchmarks.
+
+Rows are generated deterministically from the TABLE_SCHEMAS column types, so a
+run needs no MySQL server and two runs with the same seed and sizes see the same
+data. The stand-in understands what the routes need to return realistic
+payloads: column projection (including columns reached through a foreign key,
+as in the overview joins), `col = %s`, `col > %s` and `col IN (...)` conditions,
+and LIMIT. Other predicates (LIKE, MATCH, subqueries, row comparisons) are
+ignored, and writes report one affected row without changing the data.
+
+It measures the application's own overhead (routing, auth, serialization,
+compression, pooling), not MySQL's.
+"""
+import datetime
+import random
+import re
+from decimal import Decimal
+
+import mysql.connector
+
+# Rows per table for each customer in the dataset
+TABLE_RATIOS = {
+    "addresses": 0.5,
+    "customers": 1,
+    "services": None,        # fixed size, see SERVICES
+    "customer_orders": 2,
+    "order_items": 3,
+    "customer_payment_details": 2,
+}
+SERVICES = 50
+
+SELECT_RE = re.compile(
+    r"^\s*SELECT\s+(?P<columns>.+?)\s+FROM\s+(?P<table>\w+)(?:\s+(?P<alias>[a-z])\b)?(?P<rest>.*)$",
+    re.S | re.I
+)
+CONDITION_RE = re.compile(r"^(?:\w+\.)?(?P<column>\w+)\s*(?P<op>=|>|IN)\s*(?P<value>%s|\((?:%s,?\s*)+\))$", re.I)
+CLAUSE_END_RE = re.compile(r"\s+(?:ORDER BY|GROUP BY|LIMIT)\s", re.I)
+
+
+def split_top_level(text, separator):
+    """Split text on separator outside parentheses"""
+    parts, depth, start = [], 0, 0
+    index = 0
+    while index < len(text):
+        char = text[index]
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0 and text.startswith(separator, index):
+            parts.append(text[start:index])
+            index += len(separator)
+            start = index
+            continue
+        index += 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+class StandInDatabase:
+    """Deterministic rows for every table in TABLE_SCHEMAS"""
+
+    def __init__(self, schemas, customers=1000, seed=42, users=None):
+        self.schemas = {schema.table: schema for schema in schemas.values()}
+        self.users = users or {}
+        self.sizes = {
+            table: SERVICES if ratio is None else max(1, int(customers * ratio))
+            for table, ratio in TABLE_RATIOS.items()
+        }
+        rng = random.Random(seed)
+        self.rows = {table: self._generate(self.schemas[table], self.sizes[table], rng) for table in self.sizes}
+        # Foreign key column -> table it points at, for columns read through joins
+        self.references = {schema.key_column: table for table, schema in self.schemas.items()}
+
+    def _value(self, table, name, kind, index, rng):
+        if name == self.schemas[table].key_column:
+            return index
+        if name.endswith("_id"):
+            parent = {"address_id": "addresses", "customer_id": "customers", "service_id": "services",
+                      "order_id": "customer_orders"}[name]
+            return rng.randint(1, self.sizes[parent])
+        if kind == "int":
+            return rng.randint(1, 5)
+        if kind == "decimal":
+            return Decimal(rng.randint(100, 50000)) / 100
+        if kind == "date":
+            return datetime.date(2024, 1, 1) + datetime.timedelta(days=rng.randint(0, 364))
+        if kind == "enum":
+            return rng.choice(("Pending", "Completed", "Shipped", "Cancelled", "In Progress"))
+        width = int(kind[len("varchar("):-1])
+        return f"{name.split('_')[-1]}-{index}-{rng.randint(0, 99999)}"[:width]
+
+    def _generate(self, schema, size, rng):
+        return [
+            tuple(self._value(schema.table, name, kind, index, rng) for name, kind, _ in schema.columns)
+            for index in range(1, size + 1)
+        ]
+
+    def connect(self, **config):
+        return StandInConnection(self)
+
+    def select(self, query, params):
+        """Run a SELECT; returns (column names, tuple rows)"""
+        match = SELECT_RE.match(query)
+        if not match:
+            return [], []
+        table = match.group("table")
+        params = list(params or ())
+        columns = [self._column_name(column) for column in split_top_level(match.group("columns"), ",")]
+
+        if table == "table_versions":
+            return ["table_name", "version"], [(name, 1) for name in params]
+        if table == "users":
+            user = self.users.get(params[0]) if params else None
+            return ["password_hash", "role"], [user] if user else []
+        if table not in self.rows:
+            return columns, []
+
+        schema = self.schemas[table]
+        rows = self.rows[table]
+        rest = match.group("rest")
+        limit = None
+        if re.search(r"\sLIMIT\s+%s\s*$", rest, re.I):
+            limit = params.pop()
+
+        where = re.search(r"\sWHERE\s(.*)", rest, re.I | re.S)
+        if where:
+            clause = CLAUSE_END_RE.split(where.group(1))[0]
+            rows = self._filter(schema, rows, clause, params)
+        if limit is not None:
+            rows = rows[:limit]
+        return columns, [self._project(schema, row, columns) for row in rows]
+
+    @staticmethod
+    def _column_name(column):
+        column = re.split(r"\s+AS\s+", column, flags=re.I)[-1]
+        return column.split(".")[-1].strip()
+
+    def _filter(self, schema, rows, clause, params):
+        names = schema.column_names
+        for condition in split_top_level(clause, " AND "):
+            placeholders = condition.count("%s")
+            values, params = params[:placeholders], params[placeholders:]
+            match = CONDITION_RE.match(condition)
+            if not match or match.group("column") not in names:
+                continue
+            column, op = match.group("column"), match.group("op").upper()
+            if column == schema.key_column and op != "IN" and rows is self.rows[schema.table]:
+                # Keys of an unfiltered table are 1..n in order, so lookups and keyset seeks are slices
+                key = int(values[0])
+                rows = rows[key - 1:key] if op == "=" else rows[key:]
+                continue
+            position = names.index(column)
+            rows = [row for row in rows if self._compare(row[position], op, values)]
+        return rows
+
+    @staticmethod
+    def _compare(value, op, values):
+        if op == "IN":
+            return str(value) in {str(candidate) for candidate in values}
+        other = int(values[0]) if isinstance(value, int) else str(values[0])
+        value = value if isinstance(value, int) else str(value)
+        return value == other if op == "=" else value > other
+
+    def _project(self, schema, row, columns):
+        values = []
+        for name in columns:
+            if name in schema.column_names:
+                values.append(row[schema.column_names.index(name)])
+                continue
+            # A column of a referenced table, e.g. services.service_name from order_items
+            value = None
+            for key, table in self.references.items():
+                other = self.schemas[table]
+                if key in schema.column_names and name in other.column_names:
+                    parent = self.rows[table][row[schema.column_names.index(key)] - 1]
+                    value = parent[other.column_names.index(name)]
+                    break
+            values.append(value)
+        return tuple(values)
+
+
+class StandInCursor:
+    def __init__(self, database, dictionary=False):
+        self.database = database
+        self.dictionary = dictionary
+        self.rowcount = -1
+        self.lastrowid = None
+        self._rows = []
+        self._columns = []
+
+    def execute(self, query, params=None):
+        operation = query.lstrip().split(None, 1)[0].upper()
+        if operation == "SELECT":
+            self._columns, self._rows = self.database.select(query, params)
+            self.rowcount = len(self._rows)
+        else:
+            self._columns, self._rows = [], []
+            self.rowcount = 1
+            self.lastrowid = 1
+
+    def executemany(self, query, rows):
+        self.rowcount = len(rows)
+
+    def _shape(self, rows):
+        if self.dictionary:
+            return [dict(zip(self._columns, row)) for row in rows]
+        return rows
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return self._shape(rows)
+
+    def fetchmany(self, size=1):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return self._shape(rows)
+
+    def close(self):
+        self._rows = []
+
+
+class StandInConnection:
+    def __init__(self, database):
+        self.database = database
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StandInCursor(self.database, dictionary=dictionary)
+
+    def is_connected(self):
+        return True
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def install(database):
+    """Route mysql.connector.connect to the stand-in"""
+    mysql.connector.connect = database.connect
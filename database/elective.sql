@@ -59,7 +59,9 @@ CREATE TABLE `customer_orders` (
   `start_date` date NOT NULL,
   `end_date` date DEFAULT NULL,
   PRIMARY KEY (`order_id`),
-  KEY `customer_id` (`customer_id`),
+  KEY `idx_orders_customer_date` (`customer_id`,`order_date`),
+  KEY `idx_orders_status_date` (`order_status`,`order_date`),
+  KEY `idx_orders_order_date` (`order_date`),
   CONSTRAINT `customer_orders_ibfk_1` FOREIGN KEY (`customer_id`) REFERENCES `customers` (`customer_id`) ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=26 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -89,7 +91,9 @@ CREATE TABLE `customer_payment_details` (
   `payment_method` varchar(50) NOT NULL,
   `transaction_reference` varchar(255) DEFAULT NULL,
   PRIMARY KEY (`payment_id`),
-  KEY `order_id` (`order_id`),
+  KEY `idx_payments_order_date` (`order_id`,`payment_date`),
+  KEY `idx_payments_method_date` (`payment_method`,`payment_date`),
+  KEY `idx_payments_payment_date` (`payment_date`),
   CONSTRAINT `customer_payment_details_ibfk_1` FOREIGN KEY (`order_id`) REFERENCES `customer_orders` (`order_id`) ON DELETE CASCADE ON UPDATE CASCADE
 ) ENGINE=InnoDB AUTO_INCREMENT=26 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -119,6 +123,10 @@ CREATE TABLE `customers` (
   `customer_email` varchar(255) DEFAULT NULL,
   PRIMARY KEY (`customer_id`),
   KEY `address_id` (`address_id`),
+  KEY `idx_customers_name` (`customer_name`),
+  KEY `idx_customers_email` (`customer_email`),
+  KEY `idx_customers_phone_digits` ((REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(customer_phone, '+', ''), '-', ''), '.', ''), ' ', ''), '(', ''), ')', ''))),
+  FULLTEXT KEY `idx_customers_name_ft` (`customer_name`),
   CONSTRAINT `customers_ibfk_1` FOREIGN KEY (`address_id`) REFERENCES `addresses` (`address_id`)
 ) ENGINE=InnoDB AUTO_INCREMENT=26 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -165,6 +173,53 @@ INSERT INTO `order_items` VALUES (1,8,12,3,92.18,'2024-08-05'),(2,17,21,2,50.31,
 /*!40000 ALTER TABLE `order_items` ENABLE KEYS */;
 UNLOCK TABLES;
 
+--
+-- Table structure for table `revenue_by_payment_method`
+--
+
+DROP TABLE IF EXISTS `revenue_by_payment_method`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `revenue_by_payment_method` (
+  `day` date NOT NULL,
+  `payment_method` varchar(50) NOT NULL,
+  `amount` decimal(16,2) NOT NULL DEFAULT '0.00',
+  `row_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`payment_method`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `revenue_by_service`
+--
+
+DROP TABLE IF EXISTS `revenue_by_service`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `revenue_by_service` (
+  `day` date NOT NULL,
+  `service_id` int NOT NULL,
+  `amount` decimal(16,2) NOT NULL DEFAULT '0.00',
+  `row_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`service_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `revoked_tokens`
+--
+
+DROP TABLE IF EXISTS `revoked_tokens`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `revoked_tokens` (
+  `jti` varchar(64) NOT NULL,
+  `expires_at` datetime NOT NULL,
+  PRIMARY KEY (`jti`),
+  KEY `idx_revoked_tokens_expires_at` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `services`
 --
@@ -189,6 +244,56 @@ LOCK TABLES `services` WRITE;
 INSERT INTO `services` VALUES (1,'Incubate dot-com synergies',96.30),(2,'Re-contextualize value-added markets',95.18),(3,'Reinvent dot-com e-commerce',38.78),(4,'Matrix sticky functionalities',34.62),(5,'Orchestrate viral networks',44.95),(6,'Re-intermediate cross-media networks',95.61),(7,'Target turn-key architectures',26.53),(8,'Envisioneer viral applications',47.23),(9,'Incubate bricks-and-clicks platforms',70.91),(10,'Whiteboard open-source interfaces',20.40),(11,'Envisioneer sticky supply-chains',78.78),(12,'Productize mission-critical roi',52.79),(13,'Morph plug-and-play experiences',19.62),(14,'Cultivate ubiquitous portals',40.93),(15,'Integrate one-to-one roi',59.40),(16,'Morph synergistic deliverables',89.12),(17,'Deploy e-business web-readiness',47.45),(18,'E-enable collaborative metrics',92.68),(19,'Brand web-enabled web services',99.79),(20,'Visualize open-source synergies',46.28),(21,'Extend collaborative paradigms',26.33),(22,'Morph sticky users',51.57),(23,'Whiteboard e-business e-business',13.03),(24,'Streamline real-time e-markets',25.43),(25,'Redefine e-business models',28.63);
 /*!40000 ALTER TABLE `services` ENABLE KEYS */;
 UNLOCK TABLES;
+--
+-- Table structure for table `table_versions`
+--
+
+DROP TABLE IF EXISTS `table_versions`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `table_versions` (
+  `table_name` varchar(64) NOT NULL,
+  `version` bigint unsigned NOT NULL DEFAULT '0',
+  PRIMARY KEY (`table_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Dumping data for table `table_versions`
+--
+
+LOCK TABLES `table_versions` WRITE;
+/*!40000 ALTER TABLE `table_versions` DISABLE KEYS */;
+INSERT INTO `table_versions` VALUES ('addresses',0),('customer_orders',0),('customer_payment_details',0),('customers',0),('order_items',0),('services',0);
+/*!40000 ALTER TABLE `table_versions` ENABLE KEYS */;
+UNLOCK TABLES;
+--
+-- Table structure for table `users`
+--
+
+DROP TABLE IF EXISTS `users`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!50503 SET character_set_client = utf8mb4 */;
+CREATE TABLE `users` (
+  `username` varchar(255) NOT NULL,
+  `password_hash` varchar(255) NOT NULL,
+  `role` varchar(50) NOT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`username`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Populating the revenue rollups from the rows loaded above
+--
+
+INSERT INTO `revenue_by_payment_method` (day, payment_method, amount, row_count)
+SELECT payment_date, payment_method, SUM(payment_amount), COUNT(*) FROM customer_payment_details GROUP BY payment_date, payment_method;
+
+INSERT INTO `revenue_by_service` (day, service_id, amount, row_count)
+SELECT monthly_payment_date, service_id, COALESCE(SUM(order_quantity * monthly_payment_amount), 0), COUNT(*)
+FROM order_items WHERE monthly_payment_date IS NOT NULL GROUP BY monthly_payment_date, service_id;
+
 /*!40103 SET TIME_ZONE=@OLD_TIME_ZONE */;
 
 /*!40101 SET SQL_MODE=@OLD_SQL_MODE */;
@@ -0,0 +1,21 @@
+-- Composite indexes backing the filters and sort keys of GET /orders and GET /payments.
+-- Apply to databases created from an elective.sql older than these indexes:
+--   mysql -u root -p elective < database/migrations/001_order_payment_filter_indexes.sql
+--
+-- InnoDB appends the primary key to every secondary index, so each index below
+-- also serves the keyset order (<column>, <primary key>) used for pagination.
+
+ALTER TABLE `customer_orders`
+  ADD KEY `idx_orders_customer_date` (`customer_id`,`order_date`),
+  ADD KEY `idx_orders_status_date` (`order_status`,`order_date`),
+  ADD KEY `idx_orders_order_date` (`order_date`);
+
+-- The composite index now covers the foreign key, so the single-column one can go
+ALTER TABLE `customer_orders` DROP KEY `customer_id`;
+
+ALTER TABLE `customer_payment_details`
+  ADD KEY `idx_payments_order_date` (`order_id`,`payment_date`),
+  ADD KEY `idx_payments_method_date` (`payment_method`,`payment_date`),
+  ADD KEY `idx_payments_payment_date` (`payment_date`);
+
+ALTER TABLE `customer_payment_details` DROP KEY `order_id`;
@@ -0,0 +1,15 @@
+-- Indexes backing GET /customers/search.
+-- Apply to databases created from an elective.sql older than these indexes:
+--   mysql -u root -p elective < database/migrations/002_customer_search_indexes.sql
+--
+-- idx_customers_phone_digits is a functional index (MySQL 8.0.13+) on the phone number
+-- with separators removed. Its expression must stay identical to PHONE_DIGITS_SQL in
+-- app.py, otherwise the optimizer falls back to a full scan.
+
+ALTER TABLE `customers`
+  ADD KEY `idx_customers_name` (`customer_name`),
+  ADD KEY `idx_customers_email` (`customer_email`),
+  ADD KEY `idx_customers_phone_digits` ((REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(REPLACE(customer_phone, '+', ''), '-', ''), '.', ''), ' ', ''), '(', ''), ')', '')));
+
+-- InnoDB builds at most one FULLTEXT index per ALTER TABLE
+ALTER TABLE `customers` ADD FULLTEXT KEY `idx_customers_name_ft` (`customer_name`);
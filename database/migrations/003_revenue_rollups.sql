@@ -0,0 +1,32 @@
+-- Revenue rollups read by GET /reports/revenue/<report>.
+-- Apply to databases created from an elective.sql older than these tables:
+--   mysql -u root -p elective < database/migrations/003_revenue_rollups.sql
+--
+-- The application keeps both tables in step with customer_payment_details and
+-- order_items inside each write's transaction. If they ever drift (e.g. after
+-- rows were changed by hand), recompute them with `flask rebuild-revenue-rollups`.
+
+CREATE TABLE IF NOT EXISTS `revenue_by_payment_method` (
+  `day` date NOT NULL,
+  `payment_method` varchar(50) NOT NULL,
+  `amount` decimal(16,2) NOT NULL DEFAULT '0.00',
+  `row_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`payment_method`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+CREATE TABLE IF NOT EXISTS `revenue_by_service` (
+  `day` date NOT NULL,
+  `service_id` int NOT NULL,
+  `amount` decimal(16,2) NOT NULL DEFAULT '0.00',
+  `row_count` int NOT NULL DEFAULT '0',
+  PRIMARY KEY (`day`,`service_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
+
+DELETE FROM `revenue_by_payment_method`;
+INSERT INTO `revenue_by_payment_method` (day, payment_method, amount, row_count)
+SELECT payment_date, payment_method, SUM(payment_amount), COUNT(*) FROM customer_payment_details GROUP BY payment_date, payment_method;
+
+DELETE FROM `revenue_by_service`;
+INSERT INTO `revenue_by_service` (day, service_id, amount, row_count)
+SELECT monthly_payment_date, service_id, COALESCE(SUM(order_quantity * monthly_payment_amount), 0), COUNT(*)
+FROM order_items WHERE monthly_payment_date IS NOT NULL GROUP BY monthly_payment_date, service_id;
@@ -0,0 +1,13 @@
+-- Users table replacing users.json.
+-- Apply to databases created from an elective.sql older than this table:
+--   mysql -u root -p elective < database/migrations/004_users.sql
+-- then copy the accounts from the old file:
+--   flask --app app.py import-users users.json
+
+CREATE TABLE IF NOT EXISTS `users` (
+  `username` varchar(255) NOT NULL,
+  `password_hash` varchar(255) NOT NULL,
+  `role` varchar(50) NOT NULL,
+  `created_at` datetime NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (`username`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
@@ -0,0 +1,13 @@
+-- Revoked access tokens, checked by every authenticated request.
+-- Apply to databases created from an elective.sql older than this table:
+--   mysql -u root -p elective < database/migrations/005_revoked_tokens.sql
+--
+-- Rows are only needed until the token's own expiry; the application deletes
+-- expired rows through idx_revoked_tokens_expires_at.
+
+CREATE TABLE IF NOT EXISTS `revoked_tokens` (
+  `jti` varchar(64) NOT NULL,
+  `expires_at` datetime NOT NULL,
+  PRIMARY KEY (`jti`),
+  KEY `idx_revoked_tokens_expires_at` (`expires_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_0900_ai_ci;
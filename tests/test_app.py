@@ -1,26 +1,26 @@
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'benchmarks')))
 
-from app import app
+from app import app, memory_user_store, verify_password, TTLCache, db_pool, execute_query, execute_transaction, services_cache, ConnectionPool, encode_cursor, decode_cursor, validate_import_row, IMPORT_SCHEMAS, TABLE_SCHEMAS, REVENUE_ROLLUPS, MySQLUserStore, token_cache, revocation_list, PasswordHasher, PasswordHasherBusy, Histogram, slow_query_log, StackSampler
 from flask_jwt_extended import create_access_token
 from unittest.mock import patch, MagicMock
 from unittest import mock
 import pytest
+import json
+import gzip
+import zlib
+import datetime
+import jwt
+import threading
+import time
+from decimal import Decimal
+from werkzeug.exceptions import HTTPException
+from click.testing import CliRunner
+from generate_data import SyntheticPlan, synthetic_rows, main as generate_data
 from werkzeug.security import generate_password_hash
 
-# Temporary user store for testing
-temp_users = {}
-
-def load_users():
-    """Load users from the temporary store for testing."""
-    return temp_users
-
-def save_users(users):
-    """Save users to the temporary store for testing."""
-    global temp_users
-    temp_users = users
-
 def mock_jwt_required(*args, **kwargs):
     pass
 
@@ -34,28 +34,39 @@ def client():
     with patch("mysql.connector") as mock_mysql:
         mock_cursor = MagicMock()
         mock_mysql.connect.return_value.cursor.return_value = mock_cursor
+        db_pool.dispose()
+        services_cache.clear()
+        memory_user_store.clear()
 
         with mock.patch('flask_jwt_extended.view_decorators.jwt_required', side_effect=mock_jwt_required):
             with app.app_context():
                 yield app.test_client(), mock_mysql
 
-    # Clear temp_users after each test
-    temp_users.clear()
+    # Users registered by a test must not leak into the next one
+    memory_user_store.clear()
 
 def generate_token(identity, role):
     return create_access_token(identity=identity, additional_claims={"role": role, "username": identity})
 
-def setup_mock_db(mock_mysql, query_result=None, rowcount=0, side_effect=None):
+def setup_mock_db(mock_mysql, query_result=None, rowcount=0, side_effect=None, table_version=1):
     mock_cursor = mock_mysql.connect.return_value.cursor.return_value
-    mock_cursor.fetchall.return_value = query_result or []
+    executed = []
+
+    def execute(query, params=None):
+        executed.append(query)
+        if side_effect:
+            return side_effect(query, params)
+
+    def fetchall():
+        # Version lookups made for conditional GETs get their own result
+        if executed and "table_versions" in executed[-1]:
+            return [{"table_name": "customers", "version": table_version}]
+        return query_result or []
+
+    mock_cursor.fetchall.side_effect = fetchall
     mock_cursor.rowcount = rowcount
-    if side_effect:
-        mock_cursor.execute.side_effect = side_effect
-    else:
-        mock_cursor.execute.side_effect = lambda query, params=None: None
+    mock_cursor.execute.side_effect = execute
 
-# Load users from the JSON file for authentication
-users = load_users()
 
 
 
@@ -64,10 +75,6 @@ def test_register_success(client):
     client, mock_mysql = client
     setup_mock_db(mock_mysql, rowcount=0)
 
-    # Ensure the testuser does not already exist
-    if "testuser" in temp_users:
-        del temp_users["testuser"]
-
     response = client.post(
         "/register",
         json={"username": "testuser", "password": "password123", "role": "admin"},
@@ -79,8 +86,7 @@ def test_register_success(client):
 
 def test_login_success(client):
     client, mock_mysql = client
-    hashed_password = generate_password_hash("password123")
-    temp_users["testuser"] = {"password": hashed_password, "role": "admin"}
+    memory_user_store.add("testuser", generate_password_hash("password123"), "admin")
 
     response = client.post(
         "/login",
@@ -404,3 +410,1083 @@ def test_delete_service_success(client):
     assert response.status_code == 200
     assert "Service deleted successfully" in response.get_json()["message"]
     print("test_delete_service_success: Passed")
+
+
+# Connection Pool
+def test_pool_reuses_connection(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[{"service_id": 1, "service_name": "Haircut", "price_per_period": 20.0}])
+
+    client.get("/services")
+    client.get("/services")
+    assert mock_mysql.connect.call_count == 1
+    print("test_pool_reuses_connection: Passed")
+
+def test_pool_recycles_stale_connection(client):
+    _, mock_mysql = client
+    pool = ConnectionPool({}, pool_size=1, recycle=0.001)
+    connection = pool.acquire()
+    pool.release(connection)
+    pool._idle[0] = (connection, pool._idle[0][1] - 1)
+
+    pool.acquire()
+    assert mock_mysql.connect.call_count == 2
+    connection.close.assert_called()
+    print("test_pool_recycles_stale_connection: Passed")
+
+def test_pool_checkout_timeout(client):
+    _, mock_mysql = client
+    pool = ConnectionPool({}, pool_size=1, checkout_timeout=0.01)
+    assert pool.acquire() is not None
+    assert pool.acquire() is None
+    print("test_pool_checkout_timeout: Passed")
+
+def test_unexpected_error_releases_connection(client):
+    _, mock_mysql = client
+    mock_mysql.Error = type("Error", (Exception,), {})
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    mock_cursor.execute.side_effect = RuntimeError("driver bug")
+
+    for _ in range(db_pool.pool_size + 1):
+        with pytest.raises(RuntimeError):
+            execute_query("SELECT 1", fetch=True)
+    assert not db_pool._checked_out
+
+    # A failing cursor() used to leave the error handler without a query to label
+    mock_mysql.connect.return_value.cursor.side_effect = mock_mysql.Error("gone")
+    assert execute_transaction([("DELETE FROM services", None)]) is None
+    assert not db_pool._checked_out
+    print("test_unexpected_error_releases_connection: Passed")
+
+
+# Pagination
+def test_get_payments_paginated(client):
+    client, mock_mysql = client
+    payments = [
+        {"payment_id": 1, "order_id": 1, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Credit Card", "transaction_reference": "ABC123"},
+        {"payment_id": 2, "order_id": 2, "payment_date": "2024-01-02", "payment_amount": 50.0, "payment_method": "PayPal", "transaction_reference": "XYZ456"},
+    ]
+    setup_mock_db(mock_mysql, query_result=payments)
+
+    response = client.get("/payments?limit=1")
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+    assert decode_cursor(response.headers["X-Next-Cursor"])["after"] == 1
+
+    query, params = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0]
+    assert "ORDER BY payment_id LIMIT %s" in query
+    assert params == (2,)
+    print("test_get_payments_paginated: Passed")
+
+def test_get_orders_after_cursor(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[])
+
+    response = client.get(f"/orders?limit=10&after={encode_cursor(25)}")
+    assert response.status_code == 200
+    assert response.get_json() == []
+    assert "X-Next-Cursor" not in response.headers
+
+    query, params = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0]
+    assert "WHERE order_id > %s" in query
+    assert params == (25, 11)
+    print("test_get_orders_after_cursor: Passed")
+
+def test_get_customers_invalid_page_args(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    assert client.get("/customers?limit=0").status_code == 400
+    assert client.get("/customers?after=not-a-cursor").status_code == 400
+    print("test_get_customers_invalid_page_args: Passed")
+
+
+# Streaming
+def test_get_payments_streamed(client):
+    client, mock_mysql = client
+    payments = [
+        {"payment_id": 1, "order_id": 1, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Credit Card", "transaction_reference": "ABC123"},
+        {"payment_id": 2, "order_id": 2, "payment_date": "2024-01-02", "payment_amount": 50.0, "payment_method": "PayPal", "transaction_reference": "XYZ456"},
+    ]
+    setup_mock_db(mock_mysql)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    mock_cursor.fetchmany.side_effect = [payments[:1], payments[1:], []]
+
+    response = client.get("/payments?stream=1")
+    assert response.status_code == 200
+    assert response.get_json() == payments
+    mock_mysql.connect.return_value.cursor.assert_called_with(dictionary=False, buffered=False)
+    # Only the table version lookup is buffered
+    assert mock_cursor.fetchall.call_count == 1
+    print("test_get_payments_streamed: Passed")
+
+def test_get_services_streamed_rejects_pagination(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    response = client.get("/services?stream=1&limit=10")
+    assert response.status_code == 400
+    print("test_get_services_streamed_rejects_pagination: Passed")
+
+
+# Bulk Inserts
+def test_add_payments_bulk_success(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    payments = [
+        {"order_id": 1, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Credit Card", "transaction_reference": "ABC123"},
+        {"order_id": 2, "payment_date": "2024-01-02", "payment_amount": 50.0, "payment_method": "PayPal"},
+        {"order_id": 3, "payment_date": "2024-01-03"},
+    ]
+
+    response = client.post(
+        "/payments/bulk",
+        json=payments,
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["inserted"] == 2
+    assert body["errors"] == [{"index": 2, "error": "Required fields missing"}]
+
+    mock_connection = mock_mysql.connect.return_value
+    insert_call, rollup_call = mock_connection.cursor.return_value.executemany.call_args_list
+    query, rows = insert_call[0]
+    assert query.startswith("INSERT INTO customer_payment_details")
+    assert rows[1] == (2, "2024-01-02", 50.0, "PayPal", None)
+    # The revenue rollup is updated from the same rows in the same transaction
+    query, deltas = rollup_call[0]
+    assert query.startswith("INSERT INTO revenue_by_payment_method")
+    assert deltas == [("2024-01-01", "Credit Card", 100.0), ("2024-01-02", "PayPal", 50.0)]
+    # One commit for the batch, one for the table version bump
+    assert mock_connection.commit.call_count == 2
+    print("test_add_payments_bulk_success: Passed")
+
+def test_add_orders_bulk_reports_type_errors_by_index(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    orders = [
+        {"customer_id": 1, "order_status": "Pending", "order_date": "2024-01-01", "start_date": "2024-01-02"},
+        {"customer_id": 1, "order_status": "Lost", "order_date": "2024-01-01", "start_date": "2024-01-02"},
+        {"customer_id": 1, "order_status": "Pending", "order_date": "01/02/2024", "start_date": "2024-01-02"},
+        {"customer_id": "one", "order_status": "Pending", "order_date": "2024-01-01", "start_date": "2024-01-02"},
+    ]
+
+    response = client.post("/orders/bulk", json=orders, headers=headers)
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["inserted"] == 1
+    assert [error["index"] for error in body["errors"]] == [1, 2, 3]
+    assert body["errors"][0]["error"].startswith("order_status must be one of Pending")
+    assert body["errors"][1]["error"] == "order_date must be a YYYY-MM-DD date"
+    assert body["errors"][2]["error"] == "customer_id must be an integer"
+
+    cursor = mock_mysql.connect.return_value.cursor.return_value
+    cursor.executemany.reset_mock()
+    payments = [{"order_id": 1, "payment_date": "2024-01-01", "payment_amount": "lots", "payment_method": "Cash"}]
+    response = client.post("/payments/bulk", json=payments, headers=headers)
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [{"index": 0, "error": "payment_amount must be a decimal(10,2)"}]
+    # Nothing reaches the database when no row is valid
+    cursor.executemany.assert_not_called()
+    print("test_add_orders_bulk_reports_type_errors_by_index: Passed")
+
+def test_add_order_items_bulk_rejects_non_array(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    response = client.post(
+        "/order_items/bulk",
+        json={"order_id": 1, "service_id": 1, "order_quantity": 2},
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+
+    assert response.status_code == 400
+    print("test_add_order_items_bulk_rejects_non_array: Passed")
+
+
+# Streaming Imports
+def test_import_payments_csv(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    body = (
+        "order_id,payment_date,payment_amount,payment_method,transaction_reference\n"
+        "1,2024-01-01,100.00,Credit Card,ABC123\n"
+        "2,2024-13-01,50.00,PayPal,XYZ456\n"
+        "3,2024-01-03,75.5,Cash,\n"
+    )
+
+    response = client.post(
+        "/imports/payments",
+        data=body,
+        content_type="text/csv",
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+
+    assert response.status_code == 201
+    job = response.get_json()
+    assert (job["rows_read"], job["inserted"], job["rejected"]) == (3, 2, 1)
+
+    rejected = client.get(
+        f"/imports/{job['id']}/rejected",
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+    assert rejected.get_json() == [{"line": 3, "error": "payment_date must be a YYYY-MM-DD date"}]
+    print("test_import_payments_csv: Passed")
+
+def test_import_order_items_ndjson(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    body = (
+        '{"order_id": 1, "service_id": 2, "order_quantity": 3, "monthly_payment_amount": 10.5}\n'
+        'not json\n'
+    )
+
+    response = client.post(
+        "/imports/order_items",
+        data=body,
+        content_type="application/x-ndjson",
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+
+    assert response.status_code == 201
+    assert response.get_json()["inserted"] == 1
+    rows = mock_mysql.connect.return_value.cursor.return_value.executemany.call_args[0][1]
+    assert rows[0][:3] == (1, 2, 3)
+    print("test_import_order_items_ndjson: Passed")
+
+def test_import_reports_only_rows_the_database_rejects(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    mock_mysql.Error = type("Error", (Exception,), {})
+
+    def executemany(query, rows):
+        if query.startswith("INSERT INTO customer_payment_details") and any(row[0] == 99 for row in rows):
+            raise mock_mysql.Error("Cannot add or update a child row: a foreign key constraint fails")
+    mock_mysql.connect.return_value.cursor.return_value.executemany.side_effect = executemany
+    body = "".join(
+        f'{{"order_id": {order_id}, "payment_date": "2024-01-01", "payment_amount": 10, "payment_method": "Cash"}}\n'
+        for order_id in (1, 2, 99, 3)
+    )
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+
+    job = client.post("/imports/payments", data=body, content_type="application/x-ndjson", headers=headers).get_json()
+    assert (job["inserted"], job["rejected"]) == (3, 1)
+    rejected = client.get(f"/imports/{job['id']}/rejected", headers=headers).get_json()
+    assert [row["line"] for row in rejected] == [3]
+    assert rejected[0]["error"].startswith("Database rejected this row: Cannot add or update a child row")
+    print("test_import_reports_only_rows_the_database_rejects: Passed")
+
+def test_validate_import_row_checks_schema():
+    columns = IMPORT_SCHEMAS["payments"].insert_columns
+    _, error = validate_import_row({"order_id": "1", "payment_date": "2024-01-01", "payment_amount": "1.234", "payment_method": "Cash"}, columns)
+    assert error == "payment_amount must be a decimal(10,2)"
+    _, error = validate_import_row({"order_id": "1", "payment_date": "2024-01-01", "payment_amount": "1", "payment_method": "x" * 51}, columns)
+    assert error == "payment_method must be at most 50 characters"
+    print("test_validate_import_row_checks_schema: Passed")
+
+
+# Streaming Exports
+def test_export_payments_csv(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    mock_cursor.fetchmany.side_effect = [
+        [{"payment_id": 7, "order_id": 1, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Credit Card", "transaction_reference": None}],
+        [],
+    ]
+
+    response = client.get("/exports/payments?from=2024-01-01&to=2024-01-31&after=5")
+    assert response.status_code == 200
+    assert response.mimetype == "text/csv"
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0] == "payment_id,order_id,payment_date,payment_amount,payment_method,transaction_reference"
+    assert lines[1] == "7,1,2024-01-01,100.0,Credit Card,"
+
+    query, params = mock_cursor.execute.call_args[0]
+    assert "payment_id > %s AND payment_date >= %s AND payment_date <= %s" in query
+    assert query.endswith("ORDER BY payment_id")
+    assert params == (5, "2024-01-01", "2024-01-31")
+    print("test_export_payments_csv: Passed")
+
+def test_export_orders_ndjson(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    order = {"order_id": 1, "customer_id": 1, "order_status": "Pending", "order_date": "2024-01-01", "start_date": "2024-01-02", "end_date": "2024-01-03"}
+    mock_mysql.connect.return_value.cursor.return_value.fetchmany.side_effect = [[order], []]
+
+    response = client.get("/exports/orders?format=ndjson")
+    assert response.status_code == 200
+    assert [json.loads(line) for line in response.get_data(as_text=True).splitlines()] == [order]
+    print("test_export_orders_ndjson: Passed")
+
+def test_export_null_dates_round_trip_through_import(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    item = (4, 1, 2, 3, Decimal("10.50"), None)
+    mock_mysql.connect.return_value.cursor.return_value.fetchmany.side_effect = [[item], []]
+
+    response = client.get("/exports/order_items?format=ndjson")
+    exported = json.loads(response.get_data(as_text=True))
+    assert exported["monthly_payment_date"] is None
+    _, error = validate_import_row(exported, IMPORT_SCHEMAS["order_items"].insert_columns)
+    assert error is None
+    print("test_export_null_dates_round_trip_through_import: Passed")
+
+def test_export_rejects_date_filter_without_date_column(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    response = client.get("/exports/addresses?from=2024-01-01")
+    assert response.status_code == 400
+    print("test_export_rejects_date_filter_without_date_column: Passed")
+
+
+# Services Cache
+def test_services_catalog_cached_until_write(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[{"service_id": 1, "service_name": "Haircut", "price_per_period": 20.0}], rowcount=1)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    hits = services_cache.hits
+    catalog_reads = lambda: sum("FROM services" in c.args[0] for c in mock_cursor.execute.call_args_list)
+
+    client.get("/services")
+    client.get("/services")
+    assert catalog_reads() == 1
+
+    client.put(
+        "/services/1",
+        json={"service_name": "Haircut Deluxe", "price_per_period": 25.0},
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+    client.get("/services")
+    assert catalog_reads() == 2
+
+    stats = client.get("/cache/stats", headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"})
+    assert stats.get_json()["services"]["hits"] == hits + 1
+    print("test_services_catalog_cached_until_write: Passed")
+
+def test_cache_drops_load_that_raced_a_clear():
+    cache = TTLCache(300)
+
+    def load_then_write():
+        # The write commits and clears the cache while the old rows are still being read
+        cache.clear()
+        return ["old rows"]
+
+    assert cache.get_or_load("catalog", load_then_write) == ["old rows"]
+    assert cache.get_or_load("catalog", lambda: ["new rows"]) == ["new rows"]
+    print("test_cache_drops_load_that_raced_a_clear: Passed")
+
+def test_cached_catalog_tagged_by_content(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 20.0)])
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get("/services")
+    etag = response.headers["ETag"]
+    mock_cursor.execute.reset_mock()
+
+    response = client.get("/services", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    # Served from the worker's cache: neither rows nor table versions are read
+    mock_cursor.execute.assert_not_called()
+
+    services_cache.clear()
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 25.0)])
+    response = client.get("/services", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["ETag"] != etag
+    print("test_cached_catalog_tagged_by_content: Passed")
+
+
+# Conditional GET
+def test_get_customers_not_modified(client):
+    client, mock_mysql = client
+    customers = [{"customer_id": 1, "address_id": 1, "customer_name": "John Doe", "customer_phone": "1234567890", "customer_email": "john@example.com"}]
+    setup_mock_db(mock_mysql, query_result=customers, table_version=7)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get("/customers")
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    response = client.get("/customers", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert "FROM table_versions" in mock_cursor.execute.call_args[0][0]
+
+    setup_mock_db(mock_mysql, query_result=customers, table_version=8)
+    response = client.get("/customers", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    print("test_get_customers_not_modified: Passed")
+
+def test_delete_customer_bumps_versions(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+
+    client.delete("/customers/1", headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"})
+    bumped = [c.args[1][0] for c in mock_mysql.connect.return_value.cursor.return_value.execute.call_args_list if "table_versions" in c.args[0]]
+    assert bumped == ["customers", "customer_orders", "customer_payment_details"]
+    print("test_delete_customer_bumps_versions: Passed")
+
+def test_failed_write_does_not_bump_versions(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=0)
+
+    response = client.delete("/customers/1", headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"})
+    assert response.status_code == 500
+    executed = [c.args[0] for c in mock_mysql.connect.return_value.cursor.return_value.execute.call_args_list]
+    assert not any("table_versions" in query for query in executed)
+    print("test_failed_write_does_not_bump_versions: Passed")
+
+def test_import_data_command_bumps_versions(client, tmp_path):
+    _, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    path = tmp_path / "payments.ndjson"
+    path.write_text('{"order_id": 1, "payment_date": "2024-01-01", "payment_amount": 10, "payment_method": "Cash"}\n')
+
+    result = app.test_cli_runner().invoke(args=["import-data", "payments", str(path)])
+    assert result.exit_code == 0, result.output
+    bumped = [c.args[1][0] for c in mock_mysql.connect.return_value.cursor.return_value.execute.call_args_list if "table_versions" in c.args[0]]
+    assert bumped == ["customer_payment_details"]
+    print("test_import_data_command_bumps_versions: Passed")
+
+
+# Compression
+def test_get_order_items_gzip(client):
+    client, mock_mysql = client
+    order_items = [
+        {"order_item_id": i, "order_id": 1, "service_id": 1, "order_quantity": 2, "monthly_payment_amount": 100.0, "monthly_payment_date": "2024-01-01"}
+        for i in range(1, 101)
+    ]
+    setup_mock_db(mock_mysql, query_result=order_items)
+
+    response = client.get("/order_items", headers={"Accept-Encoding": "gzip, deflate"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert len(json.loads(gzip.decompress(response.get_data()))) == 100
+
+    response = client.get("/order_items", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert response.status_code == 304
+    print("test_get_order_items_gzip: Passed")
+
+def test_streamed_payments_deflate(client):
+    client, mock_mysql = client
+    payment = {"payment_id": 1, "order_id": 1, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Cash", "transaction_reference": None}
+    setup_mock_db(mock_mysql)
+    mock_mysql.connect.return_value.cursor.return_value.fetchmany.side_effect = [[payment], [payment], []]
+
+    response = client.get("/payments?stream=1", headers={"Accept-Encoding": "deflate"})
+    assert response.headers["Content-Encoding"] == "deflate"
+    assert json.loads(zlib.decompress(response.get_data())) == [payment, payment]
+    print("test_streamed_payments_deflate: Passed")
+
+def test_small_response_not_compressed(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[{"service_id": 1, "service_name": "Haircut", "price_per_period": 20.0}])
+
+    response = client.get("/services", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+    print("test_small_response_not_compressed: Passed")
+
+
+# Serialization
+def test_row_serializer_tuple_rows():
+    serializer = TABLE_SCHEMAS["orders"].serializer
+    rows = [(1, 2, "Pending", datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), None)]
+    assert json.loads(serializer.dumps(rows)) == [
+        {"order_id": 1, "customer_id": 2, "order_status": "Pending", "order_date": "2024-01-01", "start_date": "2024-01-02", "end_date": "None"}
+    ]
+
+    serializer = TABLE_SCHEMAS["order_items"].serializer
+    rows = [(1, 1, 1, 2, Decimal("92.18"), datetime.date(2024, 8, 5)), (2, 1, 1, 1, None, None)]
+    items = json.loads(serializer.dumps(rows))
+    assert items[0]["monthly_payment_amount"] == 92.18
+    assert items[1]["monthly_payment_amount"] is None
+    print("test_row_serializer_tuple_rows: Passed")
+
+def test_row_serializer_keeps_legacy_format():
+    serializer = TABLE_SCHEMAS["payments"].serializer
+    rows = [(1, 2, datetime.date(2024, 1, 1), Decimal("10.50"), "Cash", "ref-1")]
+    dict_rows = [dict(zip(TABLE_SCHEMAS["payments"].column_names, row)) for row in rows]
+    expected = ('[{"payment_id": 1, "order_id": 2, "payment_date": "2024-01-01", "payment_amount": 10.5, '
+                '"payment_method": "Cash", "transaction_reference": "ref-1"}]')
+    assert serializer.dumps(rows) == expected
+    assert serializer.dumps(dict_rows) == expected
+    print("test_row_serializer_keeps_legacy_format: Passed")
+
+
+# Field Projection
+def test_get_customers_fields(client):
+    client, mock_mysql = client
+    customers = [{"customer_id": 1, "address_id": 1, "customer_name": "John Doe", "customer_phone": "1234567890", "customer_email": "john@example.com"}]
+    setup_mock_db(mock_mysql, query_result=customers)
+
+    response = client.get("/customers?fields=customer_name")
+    assert response.status_code == 200
+    assert response.get_json() == [{"customer_id": 1, "customer_name": "John Doe"}]
+    query = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0][0]
+    assert query.startswith("SELECT customer_id, customer_name FROM customers")
+    print("test_get_customers_fields: Passed")
+
+def test_get_orders_unknown_field(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    response = client.get("/orders?fields=order_id,password")
+    assert response.status_code == 400
+    assert "password" in response.get_json()["error"]
+    print("test_get_orders_unknown_field: Passed")
+
+
+# Filtering and Sorting
+def test_get_orders_filtered_and_sorted(client):
+    client, mock_mysql = client
+    orders = [
+        {"order_id": 3, "customer_id": 1, "order_status": "Pending", "order_date": "2024-03-01", "start_date": "2024-03-02", "end_date": None},
+        {"order_id": 9, "customer_id": 1, "order_status": "Pending", "order_date": "2024-02-01", "start_date": "2024-02-02", "end_date": None},
+    ]
+    setup_mock_db(mock_mysql, query_result=orders)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get("/orders?status=Pending&customer_id=1&from=2024-01-01&sort=-order_date&limit=1")
+    assert response.status_code == 200
+    query, params = mock_cursor.execute.call_args[0]
+    assert "WHERE order_status = %s AND customer_id = %s AND order_date >= %s" in query
+    assert query.endswith("ORDER BY order_date DESC, order_id DESC LIMIT %s")
+    assert params == ("Pending", 1, "2024-01-01", 2)
+
+    cursor = response.headers["X-Next-Cursor"]
+    assert decode_cursor(cursor) == {"after": 3, "sort": "-order_date", "value": "2024-03-01"}
+
+    client.get(f"/orders?status=Pending&sort=-order_date&limit=1&after={cursor}")
+    query, params = mock_cursor.execute.call_args[0]
+    assert "(order_date < %s OR (order_date = %s AND order_id < %s))" in query
+    assert params == ("Pending", "2024-03-01", "2024-03-01", 3, 2)
+    print("test_get_orders_filtered_and_sorted: Passed")
+
+def test_get_payments_filter_validation(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    assert client.get("/payments?from=yesterday").status_code == 400
+    assert client.get("/payments?sort=payment_amount").status_code == 400
+    assert client.get("/orders?status=Lost").status_code == 400
+    assert client.get(f"/payments?sort=payment_date&after={encode_cursor(5)}").status_code == 400
+    print("test_get_payments_filter_validation: Passed")
+
+def test_get_payments_by_customer(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+
+    client.get("/payments?customer_id=4&payment_method=Cash")
+    query, params = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0]
+    assert "order_id IN (SELECT order_id FROM customer_orders WHERE customer_id = %s)" in query
+    assert params == (4, "Cash")
+    print("test_get_payments_by_customer: Passed")
+
+
+# Single-record and multi-get
+def test_get_order_item_by_id(client):
+    client, mock_mysql = client
+    item = {"order_item_id": 4, "order_id": 1, "service_id": 1, "order_quantity": 2, "monthly_payment_amount": 100.0, "monthly_payment_date": "2024-01-01"}
+    setup_mock_db(mock_mysql, query_result=[item])
+
+    response = client.get("/order_items/4")
+    assert response.status_code == 200
+    assert response.get_json() == item
+    query, params = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0]
+    assert query.endswith("FROM order_items WHERE order_item_id = %s")
+    assert params == (4,)
+    print("test_get_order_item_by_id: Passed")
+
+def test_get_address_not_found(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[])
+
+    response = client.get("/addresses/99")
+    assert response.status_code == 404
+    assert response.get_json()["error"] == "Address not found"
+    print("test_get_address_not_found: Passed")
+
+def test_get_customers_multi_get(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[{"customer_id": 1, "address_id": 1, "customer_name": "John Doe", "customer_phone": "1234567890", "customer_email": None}])
+
+    response = client.get("/customers?ids=3,1,3")
+    assert response.status_code == 200
+    query, params = mock_mysql.connect.return_value.cursor.return_value.execute.call_args[0]
+    assert "WHERE customer_id IN (%s, %s)" in query
+    assert params == (3, 1)
+    assert client.get("/customers?ids=a,b").status_code == 400
+    print("test_get_customers_multi_get: Passed")
+
+
+# Customer Overview
+def test_get_customer_overview(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    customer = {"customer_id": 1, "address_id": 2, "customer_name": "John Doe", "customer_phone": "1234567890", "customer_email": None,
+                "number_building": "123", "street": "Main St", "city": "Anytown", "zip_postcode": "12345", "state_province_county": "State", "country": "Country"}
+    order = {"order_id": 5, "customer_id": 1, "order_status": "Pending", "order_date": "2024-01-01", "start_date": "2024-01-02", "end_date": "2024-01-03"}
+    payment = {"payment_id": 9, "order_id": 5, "payment_date": "2024-01-01", "payment_amount": 100.0, "payment_method": "Cash", "transaction_reference": None}
+    item = {"order_item_id": 7, "order_id": 5, "service_id": 3, "order_quantity": 2, "monthly_payment_amount": 10.0, "monthly_payment_date": "2024-01-01",
+            "service_name": "Haircut", "price_per_period": 20.0}
+    # Payment and item queries filter through a customer_orders subquery, so match them first
+    results = {"FROM customers c": [customer], "FROM customer_payment_details": [payment], "FROM order_items": [item], "FROM customer_orders": [order]}
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    mock_cursor.fetchall.side_effect = lambda: next(
+        (rows for marker, rows in results.items() if marker in mock_cursor.execute.call_args[0][0]), []
+    )
+
+    response = client.get("/customers/1/overview")
+    assert response.status_code == 200
+    overview = response.get_json()
+    assert overview["customer"]["customer_name"] == "John Doe"
+    assert overview["address"]["address_id"] == 2
+    assert overview["payments"][0]["payment_id"] == 9
+    assert overview["orders"][0]["items"][0]["service"] == {"service_id": 3, "service_name": "Haircut", "price_per_period": 20.0}
+    # Version lookup plus one query per level, regardless of the number of orders
+    assert mock_cursor.execute.call_count == 5
+
+    response = client.get("/customers/1/overview?depth=0")
+    assert "orders" not in response.get_json()
+    print("test_get_customer_overview: Passed")
+
+
+# Customer Search
+def test_search_customers_by_name(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, 2, "Jennifer Novak", "353.817.6665x517", "tracy52@example.com")])
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get("/customers/search?q=jen nov")
+    assert response.status_code == 200
+    assert response.get_json()[0]["customer_name"] == "Jennifer Novak"
+    query, params = mock_cursor.execute.call_args[0]
+    assert "MATCH(customer_name) AGAINST" in query
+    assert params == ("+jen* +nov*", "jen nov%", "+jen* +nov*", 20)
+    print("test_search_customers_by_name: Passed")
+
+def test_search_customers_by_phone_and_email(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get("/customers/search?q=(345) 284-02&limit=5")
+    assert response.status_code == 200
+    assert response.get_json() == []
+    assert mock_cursor.execute.call_args[0][1] == ("34528402%", 5)
+
+    client.get("/customers/search?q=tracy_52@")
+    query, params = mock_cursor.execute.call_args[0]
+    assert "customer_email LIKE %s" in query
+    assert params == ("tracy\\_52@%", 20)
+    print("test_search_customers_by_phone_and_email: Passed")
+
+def test_search_customers_invalid(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    assert client.get("/customers/search").status_code == 400
+    assert client.get("/customers/search?q=jo&limit=500").status_code == 400
+    print("test_search_customers_invalid: Passed")
+
+
+# Revenue Rollups
+def test_update_payment_moves_revenue_between_buckets(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.put(
+        "/payments/1",
+        json={"order_id": 1, "payment_date": "2024-01-02", "payment_amount": 150.0, "payment_method": "Cash"},
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+    assert response.status_code == 200
+
+    queries = [call[0][0] for call in mock_cursor.execute.call_args_list]
+    remove, update, add = [query for query in queries if "table_versions" not in query]
+    assert remove.startswith("INSERT INTO revenue_by_payment_method") and "-COALESCE(SUM(payment_amount), 0)" in remove
+    assert update.strip().startswith("UPDATE customer_payment_details")
+    assert add.startswith("INSERT INTO revenue_by_payment_method") and "-COALESCE" not in add
+    print("test_update_payment_moves_revenue_between_buckets: Passed")
+
+def test_rollup_row_deltas_skip_rows_without_day():
+    rollup = REVENUE_ROLLUPS["order_items"]
+    columns = ("order_id", "service_id", "order_quantity", "monthly_payment_amount", "monthly_payment_date")
+    rows = [(1, 3, 2, 10.5, "2024-01-01"), (1, 4, 1, 20.0, None)]
+    assert rollup.row_deltas(rows, columns) == [("2024-01-01", 3, 2, 10.5)]
+    print("test_rollup_row_deltas_skip_rows_without_day: Passed")
+
+def test_revenue_report(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[
+        {"payment_method": "Cash", "amount": Decimal("150.00"), "count": Decimal("2")}
+    ])
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+
+    response = client.get(
+        "/reports/revenue/payment_methods?group=payment_method&from=2024-01-01",
+        headers={"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    )
+    assert response.status_code == 200
+    assert response.get_json() == [{"payment_method": "Cash", "amount": 150.0, "count": 2}]
+    query, params = mock_cursor.execute.call_args[0]
+    assert query.startswith("SELECT payment_method, SUM(amount) AS amount, SUM(row_count) AS count FROM revenue_by_payment_method")
+    assert "GROUP BY payment_method" in query
+    assert params == ("2024-01-01",)
+    print("test_revenue_report: Passed")
+
+def test_revenue_report_invalid(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+
+    assert client.get("/reports/revenue/customers", headers=headers).status_code == 404
+    assert client.get("/reports/revenue/services?group=payment_method", headers=headers).status_code == 400
+    assert client.get("/reports/revenue/services?from=yesterday", headers=headers).status_code == 400
+    print("test_revenue_report_invalid: Passed")
+
+
+# User Store
+def test_register_existing_user(client):
+    client, mock_mysql = client
+
+    response = client.post("/register", json={"username": "dupe", "password": "password123", "role": "staff"})
+    assert response.status_code == 201
+    # A taken name is rejected without hashing the password
+    with patch("app.password_hasher.hash", side_effect=AssertionError("hashed")):
+        response = client.post("/register", json={"username": "dupe", "password": "other", "role": "admin"})
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "User already exists"
+    print("test_register_existing_user: Passed")
+
+def test_register_race_falls_back_to_insert_conflict(client):
+    client, mock_mysql = client
+
+    # The name is free when checked but taken by the time the insert runs
+    with patch("app.memory_user_store.add", return_value=False):
+        response = client.post("/register", json={"username": "racer", "password": "password123"})
+    assert response.status_code == 409
+    assert response.get_json()["error"] == "User already exists"
+    print("test_register_race_falls_back_to_insert_conflict: Passed")
+
+def test_mysql_user_store(client):
+    client, mock_mysql = client
+    store = MySQLUserStore()
+
+    setup_mock_db(mock_mysql, query_result=[{"password_hash": "hash", "role": "staff"}], rowcount=1)
+    assert store.get("alice") == {"password": "hash", "role": "staff"}
+    assert store.add("bob", "hash", "staff") is True
+
+    # A duplicate name leaves the row untouched, so the upsert reports no affected rows
+    setup_mock_db(mock_mysql, rowcount=0)
+    assert store.get("carol") is None
+    assert store.add("alice", "hash", "admin") is False
+    print("test_mysql_user_store: Passed")
+
+
+# Verified Token Cache
+def test_token_cache_reuses_verified_claims(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+    # A user missing from the store is authorized by the role in their token
+    headers = {"Authorization": f"Bearer {generate_token('cached', 'staff')}"}
+    hits = token_cache.hits
+
+    with patch("app.jwt.decode", wraps=jwt.decode) as decode:
+        assert client.delete("/payments/1", headers=headers).status_code == 200
+        assert client.delete("/payments/2", headers=headers).status_code == 200
+    assert decode.call_count == 1
+    assert token_cache.hits == hits + 1
+    print("test_token_cache_reuses_verified_claims: Passed")
+
+def test_token_cache_honors_expiry(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+    token = create_access_token(
+        identity="short", additional_claims={"role": "admin", "username": "short"},
+        expires_delta=datetime.timedelta(seconds=-1)
+    )
+    # Cached while it was still valid
+    token_cache.put(token, jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"], options={"verify_exp": False}))
+
+    response = client.delete("/payments/1", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Token has expired"
+    print("test_token_cache_honors_expiry: Passed")
+
+
+# Token Revocation
+@pytest.fixture
+def revocation_checks():
+    """Turn on the revocation check the client fixture disables"""
+    app.config["DISABLE_BLACKLIST_CHECK"] = False
+    revocation_list.clear()
+    yield revocation_list
+    revocation_list.clear()
+    app.config["DISABLE_BLACKLIST_CHECK"] = True
+
+def test_logout_revokes_token(client, revocation_checks):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+
+    assert client.delete("/payments/1", headers=headers).status_code == 200
+    response = client.post("/logout", headers=headers)
+    assert response.status_code == 200
+    assert any(call[0][0].startswith("INSERT INTO revoked_tokens") for call in mock_cursor.execute.call_args_list)
+
+    response = client.delete("/payments/1", headers=headers)
+    assert response.status_code == 401
+    assert response.get_json()["error"] == "Token has been revoked"
+    print("test_logout_revokes_token: Passed")
+
+def test_revocations_from_other_workers_are_synced(client, revocation_checks):
+    client, mock_mysql = client
+    token = generate_token('testuser', 'admin')
+    jti = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])["jti"]
+    setup_mock_db(mock_mysql, query_result=[(jti,)], rowcount=1)
+
+    response = client.delete("/payments/1", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
+    print("test_revocations_from_other_workers_are_synced: Passed")
+
+def test_admin_revoke_token(client, revocation_checks):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, rowcount=1)
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    leaked = generate_token('someone', 'staff')
+
+    assert client.post("/tokens/revoke", json={"token": "not-a-token"}, headers=headers).status_code == 400
+    assert client.post("/tokens/revoke", json={"token": leaked}, headers=headers).status_code == 200
+    response = client.delete("/payments/1", headers={"Authorization": f"Bearer {leaked}"})
+    assert response.status_code == 401
+    print("test_admin_revoke_token: Passed")
+
+
+# Password Hashing
+def test_password_hasher_round_trip_and_limit():
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, max_pending=1, timeout=5.0)
+    password_hash = hasher.hash("secret")
+    assert password_hash.startswith("pbkdf2:sha256:1000$")
+    assert hasher.check(password_hash, "secret") is True
+    assert hasher.check(password_hash, "wrong") is False
+
+    # With every slot taken new work is refused instead of queued
+    hasher._slots.acquire()
+    with pytest.raises(PasswordHasherBusy):
+        hasher.hash("secret")
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["latency"]["count"] == 3
+    print("test_password_hasher_round_trip_and_limit: Passed")
+
+def test_login_busy_returns_503(client):
+    client, mock_mysql = client
+    client.post("/register", json={"username": "busyuser", "password": "password123", "role": "staff"})
+    with patch("app.password_hasher.check", side_effect=PasswordHasherBusy()):
+        response = client.post("/login", json={"username": "busyuser", "password": "password123"})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    print("test_login_busy_returns_503: Passed")
+
+def test_basic_auth_busy_returns_503(client):
+    client, mock_mysql = client
+    client.post("/register", json={"username": "basicuser", "password": "password123", "role": "staff"})
+    with app.test_request_context(), patch("app.password_hasher.check", side_effect=PasswordHasherBusy()):
+        with pytest.raises(HTTPException) as raised:
+            verify_password("basicuser", "password123")
+    assert raised.value.response.status_code == 503
+    assert raised.value.response.headers["Retry-After"] == "1"
+    print("test_basic_auth_busy_returns_503: Passed")
+
+def test_latency_stats_split_auth_from_data(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql)
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    before = client.get("/stats/latency", headers=headers).get_json()["requests"]
+
+    client.post("/login", json={"username": "nobody", "password": "x"})
+    after = client.get("/stats/latency", headers=headers).get_json()["requests"]
+    assert after["auth"]["count"] == before["auth"]["count"] + 1
+    # The first stats request itself is a data request
+    assert after["data"]["count"] == before["data"]["count"] + 1
+    print("test_latency_stats_split_auth_from_data: Passed")
+
+def test_latency_is_recorded_after_other_response_hooks():
+    # Flask runs after_request hooks in reverse registration order, so the first one runs last
+    hooks = [hook.__name__ for hook in app.after_request_funcs[None]]
+    assert hooks[0] == "record_request_latency"
+    assert {"compress_response", "bump_versions_after_write", "finish_profiling"} <= set(hooks[1:])
+    print("test_latency_is_recorded_after_other_response_hooks: Passed")
+
+
+# Metrics
+def test_metrics_exposition(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 20.0)])
+
+    client.get("/services")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{endpoint="get_all_services",method="GET",status="200"}' in body
+    assert 'db_query_duration_seconds_bucket{operation="SELECT",le="+Inf"}' in body
+    assert 'db_query_rows_count{operation="SELECT"}' in body
+    assert "db_pool_acquire_duration_seconds_count" in body
+    # The scrape itself is in flight while it renders
+    assert "http_requests_in_flight 1" in body
+    print("test_metrics_exposition: Passed")
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_seconds", "Test", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, ('a"b',))
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="a\\"b",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="a\\"b",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="a\\"b",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="a\\"b"} 4' in lines
+    print("test_histogram_buckets_are_cumulative: Passed")
+
+
+# Slow Query Log
+def test_slow_queries_recorded_with_plan(client):
+    client, mock_mysql = client
+    plan = [{"id": 1, "select_type": "SIMPLE", "table": "customer_orders", "type": "ALL", "key": None, "rows": 100000}]
+    order = (1, 1, "Pending", datetime.date(2024, 1, 1), datetime.date(2024, 1, 2), None)
+    setup_mock_db(mock_mysql)
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    results = {"EXPLAIN": plan, "SELECT table_name": [{"table_name": "customer_orders", "version": 1}], "SELECT": [order]}
+    mock_cursor.fetchall.side_effect = lambda: next(
+        rows for prefix, rows in results.items() if mock_cursor.execute.call_args[0][0].startswith(prefix)
+    )
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+    slow_query_log.clear()
+
+    with patch.object(slow_query_log, "threshold", 0):
+        assert client.get("/orders?status=Pending").status_code == 200
+    explains = [call[0] for call in mock_cursor.execute.call_args_list if call[0][0].startswith("EXPLAIN")]
+    assert explains and explains[-1][1] == ("Pending",)
+
+    response = client.get("/stats/slow-queries", headers=headers)
+    entry = next(entry for entry in response.get_json()["queries"] if "FROM customer_orders" in entry["query"])
+    assert entry["params"] == ["str"]
+    assert entry["plan"] == plan
+    assert "Pending" not in json.dumps(entry)
+
+    assert client.delete("/stats/slow-queries", headers=headers).status_code == 200
+    assert client.get("/stats/slow-queries", headers=headers).get_json()["queries"] == []
+    print("test_slow_queries_recorded_with_plan: Passed")
+
+def test_fast_queries_not_recorded(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 20.0)])
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    slow_query_log.clear()
+
+    with patch.object(slow_query_log, "threshold", 60):
+        client.get("/services")
+    assert slow_query_log.entries() == []
+    assert not any(call[0][0].startswith("EXPLAIN") for call in mock_cursor.execute.call_args_list)
+    print("test_fast_queries_not_recorded: Passed")
+
+
+# Request Profiling
+def test_admin_profiles_single_request(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 20.0)])
+    headers = {"Authorization": f"Bearer {generate_token('testuser', 'admin')}"}
+
+    response = client.get("/services", headers={**headers, "X-Profile": "cprofile"})
+    assert response.status_code == 200
+    profile_id = response.headers["X-Profile-Id"]
+
+    profile = client.get(f"/profiles/{profile_id}", headers=headers)
+    assert profile.mimetype == "text/plain"
+    assert "get_all_services" in profile.get_data(as_text=True)
+    listed = client.get("/profiles", headers=headers).get_json()
+    assert listed[0]["id"] == profile_id and listed[0]["endpoint"] == "get_all_services"
+    print("test_admin_profiles_single_request: Passed")
+
+def test_profile_flag_ignored_for_non_admins(client):
+    client, mock_mysql = client
+    setup_mock_db(mock_mysql, query_result=[(1, "Haircut", 20.0)])
+
+    response = client.get("/services?profile=1", headers={"Authorization": f"Bearer {generate_token('clerk', 'staff')}"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    assert "X-Profile-Id" not in client.get("/services?profile=1").headers
+    print("test_profile_flag_ignored_for_non_admins: Passed")
+
+def test_profile_flag_ignored_for_revoked_admin_token(client, revocation_checks):
+    client, mock_mysql = client
+    token = generate_token('testuser', 'admin')
+    jti = jwt.decode(token, app.config["SECRET_KEY"], algorithms=["HS256"])["jti"]
+    setup_mock_db(mock_mysql, query_result=[(jti,)])
+
+    response = client.get("/?profile=1", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "X-Profile-Id" not in response.headers
+    print("test_profile_flag_ignored_for_revoked_admin_token: Passed")
+
+def test_stack_sampler_collapses_stacks():
+    def busy_loop():
+        deadline = time.perf_counter() + 0.05
+        while time.perf_counter() < deadline:
+            pass
+
+    sampler = StackSampler(threading.get_ident(), 0.001)
+    sampler.start()
+    busy_loop()
+    lines = sampler.stop().splitlines()
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    assert stack.endswith("test_app.py:busy_loop") and int(count) > 0
+    print("test_stack_sampler_collapses_stacks: Passed")
+
+# SYNTHETIC DATA TESTING
+def test_synthetic_rows_are_deterministic_with_valid_keys():
+    plan = SyntheticPlan(400, services=5, seed=7, first_ids={"orders": 26, "customers": 26}, today=datetime.date(2026, 1, 1))
+    orders = synthetic_rows(plan, "orders", 0, 26, plan.counts["orders"])
+    payments = synthetic_rows(plan, "payments", 0, 1, plan.counts["payments"])
+    assert payments == synthetic_rows(plan, "payments", 0, 1, plan.counts["payments"])
+
+    order_dates = {row[0]: row[3] for row in orders}
+    assert all(row[1] in plan.ids("customers") for row in orders)
+    assert all(row[5] is None or row[5] >= row[4] >= row[3] for row in orders)
+    assert all(row[1] in order_dates and order_dates[row[1]] <= row[2] <= plan.today for row in payments)
+    assert len({row[5] for row in payments}) == len(payments)
+    print("test_synthetic_rows_are_deterministic_with_valid_keys: Passed")
+
+def test_generate_data_loads_tables_in_order(client):
+    client, mock_mysql = client
+    mock_cursor = mock_mysql.connect.return_value.cursor.return_value
+    executed = []
+    mock_cursor.execute.side_effect = lambda query, params=None: executed.append(query)
+    mock_cursor.fetchall.side_effect = lambda: (
+        [{"service_id": service_id, "price_per_period": Decimal("20.00")} for service_id in (1, 2, 3)]
+        if "price_per_period" in executed[-1]
+        else [{"last_id": 0}]
+    )
+    inserted = {}
+    mock_cursor.executemany.side_effect = lambda query, rows: inserted.setdefault(query.split()[2], []).extend(rows)
+
+    result = CliRunner().invoke(generate_data, [
+        "--payments", "40", "--services", "3", "--workers", "1", "--chunk-size", "15"
+    ])
+    assert result.exit_code == 0, result.output
+    assert list(inserted) == ["addresses", "services", "customers", "customer_orders", "order_items",
+                              "customer_payment_details"]
+    assert [row[0] for row in inserted["customer_payment_details"]] == list(range(1, 41))
+    # Items carry the unit price; the revenue rollup multiplies it by the quantity
+    assert all(row[4] == Decimal("20.00") for row in inserted["order_items"])
+    assert any(query.startswith("INSERT INTO revenue_by_service") for query in executed)
+    assert any("table_versions" in query for query in executed)
+    print("test_generate_data_loads_tables_in_order: Passed")